@@ -1,101 +1,256 @@
+import argparse
 import getpass
+import logging
+import os
 import mysql.connector
-import pandas as pd
 import datetime
+from mysql.connector import errorcode
 
-def get_db_connection():
-    #connect to labthreesixfive db
+import db
+import instrument
+import migrations
+import queries
+import tables
+from cache import TTLCache
+
+# pandas and NumPy take most of a second to import, so the modules built on them (pricing,
+# suggest, occupancy, revenue_engine, revenue_summary) are imported by the functions that
+# need them rather than here, and the menu comes up without them.
+
+REVENUE_BACKENDS = ("sql", "numpy", "summary")  # revenue_engine.BACKENDS, without importing it
+
+# Room rows by (party size, RoomCode, bedType) filter, and the rooms-and-rates report
+room_cache = TTLCache(maxsize=256, ttl=3600)
+report_cache = TTLCache(maxsize=8, ttl=300)
+
+
+def invalidate_reservation_caches():
+    # Bookings and cancellations change popularity and next check-in in the room report
+    report_cache.invalidate('rooms_and_rates')
+
+
+def invalidate_room_caches():
+    # For changes to lab7_rooms itself
+    room_cache.clear()
+    report_cache.clear()
+
+
+def cache_stats():
+    return {'rooms': room_cache.stats(), 'reports': report_cache.stats()}
+
+
+def get_db_pool(host='mysql.labthreesixfive.com', database='jthammet', lazy=True):
+    #connect to labthreesixfive db through a pool of health-checked connections
     user = input("User: ")
     db_password = getpass.getpass()
 
     try:
-        conn = mysql.connector.connect(
+        # A lazy pool connects on first use, so the menu doesn't wait on the server; a rejected
+        # login then surfaces on the first action (see login_rejected)
+        pool = db.ConnectionPool(
+            lazy=lazy,
             user=user,
             password=db_password,
-            host='mysql.labthreesixfive.com',
-            database='jthammet'
+            host=host,
+            database=database
         )
-        print("Successfully Connected to LabThreeSixFive")
-        return conn
+        return pool
     except mysql.connector.Error as err:
         print(f"Error: {err}")
         return None
 
-def get_rooms_and_rates(conn):
-    #Fetches and displays room details sorted by popularity using Pandas
-    
-    query = """
+
+def login_rejected(err):
+    # The server refused the user, password or database; no retry with this pool can succeed
+    return err.errno in (errorcode.ER_ACCESS_DENIED_ERROR, errorcode.ER_DBACCESS_DENIED_ERROR)
+
+
+# Room report sorted by popularity, built from one grouped pass over reservations
+# rather than four correlated subqueries per room
+ROOMS_AND_RATES_QUERY = """
+    SELECT 
+        r.RoomCode,
+        r.RoomName,
+        r.Beds,
+        r.bedType,
+        r.maxOcc,
+        r.basePrice,
+        r.decor,
+        ROUND(COALESCE(stats.recent_stays, 0) / 180, 2) AS popularity_score,
+        stats.next_available_checkin,
+        stats.last_stay_length,
+        stats.last_checkout_date
+    FROM lab7_rooms r
+    LEFT JOIN (
         SELECT 
-            r.RoomCode,
-            r.RoomName,
-            r.Beds,
-            r.bedType,
-            r.maxOcc,
-            r.basePrice,
-            r.decor,
-
-            ROUND(
-                (SELECT COUNT(*) 
-                 FROM jthammet.lab7_reservations res 
-                 WHERE res.Room = r.RoomCode 
-                   AND res.CheckIn >= (SELECT CURDATE() - 180)
-                ) / 180, 2
-            ) AS popularity_score,
-
-            (SELECT MIN(CheckIn) 
-             FROM jthammet.lab7_reservations res 
-             WHERE res.Room = r.RoomCode 
-               AND res.CheckIn >= CURDATE()
-            ) AS next_available_checkin,
-
-            (SELECT DATEDIFF(MAX(Checkout), MIN(CheckIn)) 
-             FROM jthammet.lab7_reservations res 
-             WHERE res.Room = r.RoomCode
-             GROUP BY res.Room
-            ) AS last_stay_length,
-
-            (SELECT MAX(Checkout) 
-             FROM jthammet.lab7_reservations res 
-             WHERE res.Room = r.RoomCode
-             GROUP BY res.Room
-            ) AS last_checkout_date
-
-        FROM jthammet.lab7_rooms r
-        ORDER BY popularity_score DESC;
-    """
-
-    cursor = None
-    try:
+            res.Room,
+            SUM(res.CheckIn >= (SELECT CURDATE() - 180)) AS recent_stays,
+            MIN(CASE WHEN res.CheckIn >= CURDATE() THEN res.CheckIn END) AS next_available_checkin,
+            DATEDIFF(MAX(res.Checkout), MIN(res.CheckIn)) AS last_stay_length,
+            MAX(res.Checkout) AS last_checkout_date
+        FROM lab7_reservations res
+        GROUP BY res.Room
+    ) stats ON stats.Room = r.RoomCode
+    ORDER BY popularity_score DESC;
+"""
+
+
+# Shown in place of NULL for rooms without reservations
+ROOMS_AND_RATES_DEFAULTS = {
+    'popularity_score': 0.00,
+    'next_available_checkin': 'No Bookings',
+    'last_stay_length': 0,
+    'last_checkout_date': 'No Bookings'
+}
+
+
+def rooms_and_rates_rows(conn):
+    # Room report as (columns, rows), served from report_cache until a booking or
+    # cancellation changes popularity or the entry's TTL runs out
+    def load():
         cursor = conn.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-
-        df = pd.DataFrame(rows, columns=columns)
+        try:
+            cursor.execute(ROOMS_AND_RATES_QUERY)
+            rows = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description]
+        finally:
+            cursor.close()
 
         # Handle NULL values gracefully
-        df = df.fillna({
-            'popularity_score': 0.00,
-            'next_available_checkin': 'No Bookings',
-            'last_stay_length': 0,
-            'last_checkout_date': 'No Bookings'
-        })
-
-        if df.empty:
+        defaults = [ROOMS_AND_RATES_DEFAULTS.get(column) for column in columns]
+        return columns, [tuple(default if value is None else value for value, default in zip(row, defaults))
+                         for row in rows]
+
+    return report_cache.get_or_load('rooms_and_rates', load)
+
+
+def rooms_and_rates_frame(conn):
+    import pandas as pd
+    columns, rows = rooms_and_rates_rows(conn)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def get_rooms_and_rates(conn):
+    #Fetches and displays room details sorted by popularity
+    try:
+        columns, rows = rooms_and_rates_rows(conn)
+
+        if not rows:
             print("No rooms found.")
         else:
             print("\n**Room List Sorted by Popularity:**")
-            print(df.to_string(index=False))  # Display without Pandas index
+            print(tables.format_table(columns, rows))
 
     except mysql.connector.Error as err:
         print(f"Database query error: {err}")
+
+
+def candidate_rooms(cursor, total_guests, room_preference, bed_type):
+    # Rooms that fit the party and preferences, regardless of dates. lab7_rooms
+    # rarely changes, so results are kept in room_cache keyed by the filter.
+    def load():
+        query = """
+            SELECT r.RoomCode, r.RoomName, r.Beds, r.bedType, r.maxOcc, r.basePrice, r.decor
+            FROM lab7_rooms r
+            WHERE r.maxOcc >= %s
+        """
+        params = [total_guests]
+
+        # Extend query if room or bed preference specified
+        if room_preference != "ANY":
+            query += " AND r.RoomCode = %s"
+            params.append(room_preference)
+
+        if bed_type != "Any":
+            query += " AND r.bedType = %s"
+            params.append(bed_type)
+
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    return room_cache.get_or_load((total_guests, room_preference, bed_type), load)
+
+
+def find_available_rooms(cursor, total_guests, room_preference, bed_type, start_date, end_date, index=None):
+    # Returns rooms matching the preferences with no reservation overlapping the stay,
+    # using one query for the whole candidate list instead of one per room.
+    # With an OccupancyIndex the overlap check is answered in process instead.
+    rooms = candidate_rooms(cursor, total_guests, room_preference, bed_type)
+    if not rooms:
+        return []
+
+    if index is not None:
+        return index.available(rooms, start_date, end_date)
+
+    # Same overlap check as before, applied to every candidate room at once
+    placeholders = ', '.join(['%s'] * len(rooms))
+    cursor.execute(f"""
+        SELECT DISTINCT res.Room FROM lab7_reservations res
+        WHERE res.Room IN ({placeholders}) AND (
+            (res.CheckIn <= %s AND res.Checkout > %s) OR
+            (res.CheckIn < %s AND res.Checkout >= %s) OR
+            (res.CheckIn >= %s AND res.Checkout <= %s)
+        )
+    """, [room[0] for room in rooms] + [start_date, start_date, end_date, end_date, start_date, end_date])
+    booked = {row[0] for row in cursor.fetchall()}
+
+    return [room for room in rooms if room[0] not in booked]
+
+
+# Inserts the stay only if the room is still free, so the availability re-check and the
+# insert happen in one statement
+BOOK_ROOM_QUERY = """
+    INSERT INTO lab7_reservations (Room, CheckIn, Checkout, Rate, LastName, FirstName, Adults, Kids)
+    SELECT r.RoomCode, %s, %s, %s, %s, %s, %s, %s
+    FROM lab7_rooms r
+    WHERE r.RoomCode = %s AND NOT EXISTS (
+        SELECT 1 FROM lab7_reservations res
+        WHERE res.Room = r.RoomCode AND (
+            (res.CheckIn <= %s AND res.Checkout > %s) OR
+            (res.CheckIn < %s AND res.Checkout >= %s) OR
+            (res.CheckIn >= %s AND res.Checkout <= %s)
+        )
+    )
+"""
+
+
+def book_room(conn, room_code, start_date, end_date, total_cost, last_name, first_name, adults, kids):
+    # Books the room in one transaction and returns the new reservation code,
+    # or None if another booking took the room for those dates first
+    if conn.in_transaction:
+        conn.commit()  # End any read-only transaction so the booking runs on its own
+
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        # Locking the room row makes concurrent bookings of the same room wait for this one
+        cursor.execute("SELECT RoomCode FROM lab7_rooms WHERE RoomCode = %s FOR UPDATE", (room_code,))
+        cursor.fetchall()
+
+        cursor.execute(BOOK_ROOM_QUERY, (
+            start_date, end_date, total_cost, last_name, first_name, adults, kids, room_code,
+            start_date, start_date, end_date, end_date, start_date, end_date))
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return None
+
+        code = cursor.lastrowid  # CODE is AUTO_INCREMENT
+        import revenue_summary
+        revenue_summary.apply_stays(cursor, [(room_code, start_date, end_date, total_cost)])
+        conn.commit()
+        invalidate_reservation_caches()
+        return code
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
     finally:
-        if cursor:
-            cursor.close()  # Close cursor after execution
+        cursor.close()
 
 
-def make_reservation(conn):
+def make_reservation(conn, index=None):
     # Handles user input, finds available rooms, and books a reservation
+    import pricing
+    import suggest
 
     print("\n **New Reservation**")
 
@@ -123,84 +278,31 @@ def make_reservation(conn):
 
     print("\nSearching for available rooms...\n")
 
-    # 2. Ensure connection is still open
-    if not conn.is_connected():
-        print("Database connection lost. Reconnecting...")
-        conn.reconnect()
-
     cursor = conn.cursor(buffered=True)  # Ensure query results are properly fetched
 
     try:
-        # Build the query based on user input with parameterized statements
-        query = """
-            SELECT r.RoomCode, r.RoomName, r.Beds, r.bedType, r.maxOcc, r.basePrice, r.decor
-            FROM jthammet.lab7_rooms r
-            WHERE r.maxOcc >= %s
-        """
-        params = [total_guests]
-
-        # Extend query if room or bed preference specified
-        if room_preference != "ANY":
-            query += " AND r.RoomCode = %s"
-            params.append(room_preference)
-
-        if bed_type != "Any":
-            query += " AND r.bedType = %s"
-            params.append(bed_type)
-
-        cursor.execute(query, params)  # Execute the query
-        rooms = cursor.fetchall()  # Fetch all results
-
-        # 3. Filter rooms based on availability
-        available_rooms = []
-        for room in rooms:
-            room_code = room[0]
-
-            # Check if the room is already booked for the given dates
-            cursor.execute("""
-                SELECT 1 FROM jthammet.lab7_reservations
-                WHERE Room = %s AND (
-                    (CheckIn <= %s AND Checkout > %s) OR 
-                    (CheckIn < %s AND Checkout >= %s) OR
-                    (CheckIn >= %s AND Checkout <= %s)
-                )
-            """, (room_code, start_date, start_date, end_date, end_date, start_date, end_date))
+        # 3. Find rooms matching the preferences that are free for the stay
+        available_rooms = find_available_rooms(cursor, total_guests, room_preference, bed_type, start_date, end_date, index)
 
-            cursor.fetchall()  # Ensure results are consumed
-
-            if not cursor.rowcount:
-                available_rooms.append(room)
-
-        # 4. If no exact match, suggest alternatives
+        # 4. If no exact match, suggest the closest free windows in similar rooms
         if not available_rooms:
             print("No exact matches found. Suggesting similar options...\n")
-            cursor.execute("""
-                SELECT r.RoomCode, r.RoomName, r.Beds, r.bedType, r.maxOcc, r.basePrice, r.decor
-                FROM jthammet.lab7_rooms r
-                WHERE r.maxOcc >= %s
-                ORDER BY ABS(DATEDIFF(%s, CURDATE())) ASC
-            """, (total_guests, start_date))
-
-            # Fetch all alternative rooms
-            alternative_rooms = cursor.fetchall()
-
-            # Ensure we correctly slice to the top 5 rooms
-            suggested_rooms = alternative_rooms[:5]
-
-            # Debugging: Print what should be only 5 rooms
-            print("Debug - Suggested Rooms (should be 5 max):", suggested_rooms)
-
+            rooms = candidate_rooms(cursor, total_guests, "ANY", "Any")
+            options = suggest.suggest_alternatives(cursor, rooms, room_preference, bed_type,
+                                                   start_date, end_date, index=index)
         else:
-            suggested_rooms = available_rooms  # If exact matches are found, use them
+            options = [(room, start_date, end_date) for room in available_rooms]  # Exact matches
 
-        if not suggested_rooms:
+        if not options:
             print("No suitable rooms available. Try different dates or preferences.")
             return
 
-        # Ensure we are only printing `suggested_rooms`, not `available_rooms`
         print("Available Rooms:\n")
-        for i, room in enumerate(suggested_rooms, start=1):  # Use `suggested_rooms`
-            print(f"{i}. {room[1]} ({room[0]}) - {room[2]} beds ({room[3]}) - Max {room[4]} guests - ${room[5]}/night - {room[6]} decor")
+        costs = pricing.stay_costs([room[5] for room, _, _ in options],
+                                   [start for _, start, _ in options], [end for _, _, end in options])
+        for i, ((room, start, end), cost) in enumerate(zip(options, costs), start=1):
+            dates = "" if (start, end) == (start_date, end_date) else f" - {start} to {end}"
+            print(f"{i}. {room[1]} ({room[0]}) - {room[2]} beds ({room[3]}) - Max {room[4]} guests - ${room[5]}/night - {room[6]} decor - ${cost:.2f} total{dates}")
 
         print("\nChoose a room by entering the number, or enter 0 to cancel.")
         try:
@@ -208,24 +310,19 @@ def make_reservation(conn):
             if choice == 0:
                 print("Reservation canceled.")
                 return
-            selected_room = suggested_rooms[choice - 1]  # Ensure we use `suggested_rooms`
+            selected_room, start_date, end_date = options[choice - 1]
+            total_cost = float(costs[choice - 1])
         except (ValueError, IndexError):
             print("Invalid choice.")
             return
 
         # 6. Calculate total cost
-        base_rate = float(selected_room[5])
         num_days = (end_date - start_date).days
-        num_weekdays = sum(1 for i in range(num_days) if (start_date + datetime.timedelta(days=i)).weekday() < 5)
-        num_weekends = num_days - num_weekdays
-
-        total_cost = (num_weekdays * base_rate) + (num_weekends * base_rate * 1.1)
-        total_cost = round(total_cost, 2)
 
         # 7. Confirm & insert reservation
         print("\nReservation Summary")
         print(f"Name: {first_name} {last_name}")
-        print(f"Room: {selected_room[1]} ({room_code}) - {selected_room[3]} bed")
+        print(f"Room: {selected_room[1]} ({selected_room[0]}) - {selected_room[3]} bed")
         print(f"Dates: {start_date} to {end_date} ({num_days} nights)")
         print(f"Guests: {adults} adults, {kids} children")
         print(f"Total Cost: ${total_cost}")
@@ -235,29 +332,51 @@ def make_reservation(conn):
             print("Reservation canceled.")
             return
 
-        cursor.execute("SELECT MAX(CODE) FROM jthammet.lab7_reservations")
-        max_code = cursor.fetchone()[0]
-
-        # Ensure a valid starting point
-        if max_code is None:
-            new_code = 1
-        else:
-            new_code = max_code + 1  # Increment for uniqueness
+        code = book_room(conn, selected_room[0], start_date, end_date, total_cost, last_name, first_name, adults, kids)
+        if code is None:
+            print("Sorry, that room was just booked for those dates. Please search again.")
+            return
 
-        cursor.execute("""
-            INSERT INTO jthammet.lab7_reservations (Room, CheckIn, Checkout, Rate, LastName, FirstName, Adults, Kids)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (selected_room[0], start_date, end_date, total_cost, last_name, first_name, adults, kids))
-
-        conn.commit()
-        print("Reservation successful!")
+        if index is not None:
+            index.add(code, selected_room[0], start_date, end_date)
+        print(f"Reservation successful! Your reservation code is {code}.")
 
     except mysql.connector.Error as err:
         print(f"Database query error: {err}")
     finally:
         cursor.close()  # Close cursor at the very end
 
-def cancel_reservation(conn):
+def delete_reservation(conn, code):
+    # Deletes the reservation and backs its stay out of the revenue summary in one
+    # transaction. Returns False if there was no reservation with that code.
+    if conn.in_transaction:
+        conn.commit()  # End any read-only transaction so the delete runs on its own
+
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        cursor.execute("SELECT Room, CheckIn, Checkout, Rate FROM lab7_reservations WHERE CODE = %s FOR UPDATE",
+                       (code,))
+        stays = cursor.fetchall()
+        if not stays:
+            conn.rollback()
+            return False
+
+        shape, query = queries.CANCEL_DELETE
+        queries.execute(conn, shape, query, (code,))
+        import revenue_summary
+        revenue_summary.apply_stays(cursor, stays, sign=-1)
+        conn.commit()
+        invalidate_reservation_caches()
+        return True
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def cancel_reservation(conn, index=None):
     # Get name of customer to search for reservations
     print("Reservation Cancellation Request:\n")
     firstname = input('Enter Firstname: ').capitalize().strip()
@@ -267,25 +386,11 @@ def cancel_reservation(conn):
             print("Invalid characters used, returning to home.")
             return
 
-    if not conn.is_connected():
-        print("Database connection lost. Reconnecting...")
-        conn.reconnect()
-
-    cursor = None
     try:
-        query = (f"""
-            SELECT * 
-            FROM jthammet.lab7_reservations AS r 
-            WHERE r.firstname = \"{firstname}\" AND lastname = \"{lastname}\" 
-            ORDER BY r.checkin""")
-        cursor = conn.cursor(query)
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-
-        df = pd.DataFrame(rows, columns=columns)
-        currentreservations = df.to_string(index=False)
-        if df.empty:
+        columns, rows = queries.fetch(conn, queries.CANCEL_LOOKUP, (firstname, lastname))
+
+        currentreservations = tables.format_table(columns, rows)
+        if not rows:
             print("No reservations found.")
 
         else:
@@ -299,237 +404,446 @@ def cancel_reservation(conn):
                     if char in selectedres:
                         print("Invalid characters used, returning home.")
                         return
-                #need to check if code is one of their reservations
                 if selectedres == 'EXIT':
                     print("Returning to home\n")
                     return
                 try:
                     selectedres = int(selectedres)
-                    query = (f"""
-                        WITH t1 as (
-                            SELECT * 
-                            FROM jthammet.lab7_reservations AS r 
-                            WHERE r.firstname = \"{firstname}\" AND lastname = \"{lastname}\" 
-                            ORDER BY r.checkin
-                        ) SELECT t1.code
-                            FROM t1
-                            WHERE t1.code = {selectedres}""")
-                    cursor = conn.cursor(query)
-                    cursor.execute(query)
-                    rows = cursor.fetchall()
-                    columns = [desc[0] for desc in cursor.description]
-                    df = pd.DataFrame(rows, columns=columns)
-                    if df.empty:
-                        print(f"The reservation with code {selectedres} was not found under your name.")
-                    else:
-                        while True:
-                            #Confirm input
-                            conf = input("Confirm? (Yes/No): ")
-                            if conf == 'Yes':
-                                print(f"The reservation with code: {selectedres} has been cancelled.")
-                                query = (f"""DELETE 
-                                            FROM jthammet.lab7_reservations as r
-                                            WHERE r.CODE = {selectedres}""")
-                                cursor = conn.cursor(query)
-                                cursor.execute(query)
-                                return
-                            elif conf =='No':
-                                return
-                except:
+                except ValueError:
                     print("Invalid Input, returning to home")
                     return
 
+                #need to check if code is one of their reservations
+                columns, rows = queries.fetch(conn, queries.CANCEL_VERIFY, (selectedres, firstname, lastname))
+                if not rows:
+                    print(f"The reservation with code {selectedres} was not found under your name.")
+                else:
+                    while True:
+                        #Confirm input
+                        conf = input("Confirm? (Yes/No): ")
+                        if conf == 'Yes':
+                            if not delete_reservation(conn, selectedres):
+                                print(f"The reservation with code {selectedres} no longer exists.")
+                                return
+                            print(f"The reservation with code: {selectedres} has been cancelled.")
+                            if index is not None:
+                                index.remove(selectedres)
+                            return
+                        elif conf =='No':
+                            return
+
     except mysql.connector.Error as err:
         print(f"Database query error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
 
-def reservation_info(conn):
+
+PAGE_SIZE = 50  # Rows per page when streaming the whole reservations table
+
+
+def stream_reservations(conn, page_size=PAGE_SIZE, keyset=False, after_code=None):
+    # Yields (columns, rows) pages of the whole reservations table without holding it in memory.
+    # By default rows come off one unbuffered cursor with fetchmany; with keyset=True each page
+    # is its own CODE > last_seen query, so stopping early leaves nothing to drain, and
+    # after_code starts after that reservation instead of at the beginning.
+    cursor = conn.cursor(buffered=False)
+    finished = False
+    try:
+        if keyset:
+            last_seen = after_code
+            while True:
+                if last_seen is None:
+                    cursor.execute("SELECT * FROM lab7_reservations ORDER BY CODE LIMIT %s", (page_size,))
+                else:
+                    cursor.execute("SELECT * FROM lab7_reservations WHERE CODE > %s ORDER BY CODE LIMIT %s",
+                                   (last_seen, page_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                columns = [desc[0] for desc in cursor.description]
+                last_seen = rows[-1][columns.index('CODE')]
+                yield columns, rows
+        else:
+            cursor.execute("SELECT * FROM lab7_reservations")
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                yield columns, rows
+        finished = True
+    finally:
+        if not finished and not keyset:
+            conn.consume_results()  # Drain the rest of an abandoned unbuffered result
+        cursor.close()
+
+
+def print_reservation_pages(conn, page_size=PAGE_SIZE, keyset=False):
+    # Prints the table a page at a time, asking before fetching the next page
+    shown = 0
+    for columns, rows in stream_reservations(conn, page_size, keyset):
+        print('\n' + tables.format_table(columns, rows, header=(shown == 0)))
+        shown += len(rows)
+        if len(rows) < page_size:
+            break
+        if input(f"-- {shown} shown. Press Enter for more, or q to stop: ").strip().lower() == 'q':
+            break
+    if shown == 0:
+        print("No reservations found.")
+
+
+def prompt_reservation_filters():
+    # (firstname, lastname, startdate, enddate, roomcode, reservationcode), blank for any
     print("\n***RESERVATION INFORMATION***\n")
-    fqline = ''
-    lqline = ''
-    roomqline = ''
-    dateqline = ''
-    resqline = ''
     firstname = input('Enter Firstname, Leave Blank For Any: ').strip()
-    if firstname != '':
-        for char in '%_[]^-{}':
-            if char in firstname:
-                fqline = f"AND r.firstname LIKE \"{firstname}\""
-                break
-            else:
-                fqline = f"AND r.firstname = \"{firstname}\""
     lastname = input('Enter Lastname or Leave Blank For Any: ').strip()
-    if lastname != '':
-        for char in '%_[]^-{}':
-            if char in lastname:
-                lqline = f"AND r.lastname LIKE \"{lastname}\""
-                break
-            else:
-                lqline = f"AND r.lastname = \"{lastname}\""
     startdate = input('Enter Starting Date or Leave Blank for Any: ').strip()
-    for char in "%_[]^{}":
-        if char in startdate:
-            print("Invalid characters used, returning home.")
-            return
     enddate = input('Enter End Date or Leave Blank For Any: ').strip()
-    for char in "%_[]^{}":
-        if char in enddate:
-            print("Invalid characters used, returning home.")
-            return
     roomcode = input('Enter Room Code or Leave Blank For Any: ').strip()
-    if roomcode != '':
-        for char in '%_[]^-{}':
-            if char in roomcode:
-                roomqline = f"AND r.room LIKE \"{roomcode}\""
-                break
-            else:
-                roomqline = f"AND r.room = \"{roomcode}\""
     reservationcode = input('Enter Reservation Code or Leave Blank For Any: ')
-    for char in "%_[]^-{}":
-        if char in reservationcode:
-            print("Invalid characters used, returning home.")
-            return
-    if startdate != '' and enddate != '':
-        dateqline = f'AND ((r.checkin <= \'{startdate}\' AND r.checkout >= \'{startdate}\') OR (r.checkin <= \'{enddate}\' AND r.checkout >= \'{enddate}\'))'
-    elif startdate != '' and enddate == '':
-        dateqline = f'AND (r.checkin <= \'{startdate}\' AND r.checkout >= \'{startdate}\')'
-    elif startdate == '' and enddate != '':
-        dateqline = f'AND (r.checkin <= \'{enddate}\' AND r.checkout >= \'{enddate}\')'
-    if reservationcode != '':
-        resqline = f'AND r.CODE = \'{reservationcode}\''
-
-    checkifallempty = fqline + lqline + dateqline + roomqline + resqline
-
-    if checkifallempty == '':
-        query = """SELECT * FROM jthammet.lab7_reservations"""
-    else:
-        query = f"""SELECT *
-                    FROM jthammet.lab7_reservations as r
-                    where 1 = 1 {fqline} {lqline} {dateqline} {roomqline} {resqline}"""
-
-    if not conn.is_connected():
-        print("Database connection lost. Reconnecting...")
-        conn.reconnect()
-
-    cursor = None
+    return firstname, lastname, startdate, enddate, roomcode, reservationcode
+
+
+def reservation_info(conn, page_size=PAGE_SIZE, keyset=False):
+    firstname, lastname, startdate, enddate, roomcode, reservationcode = prompt_reservation_filters()
     try:
+        shape, query, params = queries.reservation_info_statement(
+            firstname, lastname, startdate, enddate, roomcode, reservationcode,
+            reversed_names=migrations.reversed_names(conn))
+    except ValueError:
+        print("Invalid characters used, returning home.")
+        return
 
-        cursor = conn.cursor(query)
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
+    try:
+        # With every filter blank the result is the whole table, so stream it in pages
+        if not any([firstname, lastname, startdate, enddate, roomcode, reservationcode]):
+            print_reservation_pages(conn, page_size, keyset)
+            return
+
+        columns, rows = queries.fetch(conn, (shape, query), params)
 
-        df = pd.DataFrame(rows, columns=columns)
-        if df.empty:
+        if not rows:
             print("No reservations found.")
         else:
-            print('\n' + df.to_string(index=False))
+            print('\n' + tables.format_table(columns, rows))
     except mysql.connector.Error as err:
         print(f"Database query error: {err}")
+
+CALENDAR_DAYS = 30  # Default window for the occupancy calendar
+CALENDAR_GRID_DAYS = 62  # Longer windows show the rates without the night-by-night grid
+
+
+def occupancy_calendar_data(conn, start_date, end_date, room_codes=None, index=None):
+    # (room codes, rooms x nights booked matrix, per-room rate, per-night rate) for the nights
+    # in [start_date, end_date), for the given room codes or every room. Unknown codes are dropped.
+    from occupancy import occupancy_calendar
+    cursor = conn.cursor(buffered=True)
+    try:
+        all_codes = sorted(room[0] for room in candidate_rooms(cursor, 0, "ANY", "Any"))
+        known = set(all_codes)
+        codes = all_codes if not room_codes else [code for code in room_codes if code in known]
+        booked, room_rates, day_rates = occupancy_calendar(cursor, codes, start_date, (end_date - start_date).days,
+                                                           index, all_rooms=not room_codes)
     finally:
-        if cursor:
-            cursor.close()
+        cursor.close()
+    return codes, booked, room_rates, day_rates
+
+
+def print_occupancy_grid(codes, booked, start_date):
+    # One line per room, '#' for a booked night and '.' for a free one, under the day of month
+    days = [start_date + datetime.timedelta(days=i) for i in range(booked.shape[1])]
+    width = max(len(code) for code in codes) + 1
+    print(' ' * width + ''.join(str(day.day // 10) if day.day >= 10 else ' ' for day in days))
+    print(' ' * width + ''.join(str(day.day % 10) for day in days))
+    for code, row in zip(codes, booked):
+        print(f"{code:<{width}}" + ''.join('#' if night else '.' for night in row))
+
+
+def occupancy_calendar_view(conn, index=None):
+    print("\n***OCCUPANCY CALENDAR***\n")
+    start_date = input("Begin Date (YYYY-MM-DD) or Leave Blank For Today: ").strip()
+    end_date = input(f"End Date (YYYY-MM-DD) or Leave Blank For {CALENDAR_DAYS} Nights: ").strip()
+    room_codes = input("Room Codes (comma separated) or Leave Blank For All: ").strip().upper()
+    try:
+        start_date = datetime.date.fromisoformat(start_date) if start_date else datetime.date.today()
+        end_date = (datetime.date.fromisoformat(end_date) if end_date
+                    else start_date + datetime.timedelta(days=CALENDAR_DAYS))
+    except ValueError:
+        print("Invalid date format.")
+        return
+    if start_date >= end_date:
+        print("Invalid date range. Start date must be before end date.")
+        return
+    room_codes = [code.strip() for code in room_codes.split(',') if code.strip()]
 
-def revenue(con):
+    try:
+        codes, booked, room_rates, day_rates = occupancy_calendar_data(conn, start_date, end_date, room_codes, index)
+    except mysql.connector.Error as err:
+        print(f"Database query error: {err}")
+        return
+    if not codes:
+        print("No rooms found.")
+        return
+    unknown = [code for code in room_codes if code not in codes]
+    if unknown:
+        print(f"Unknown room codes skipped: {', '.join(unknown)}")
+
+    nights = (end_date - start_date).days
+    print(f"\n**Occupancy by Room, {start_date} to {end_date} ({nights} nights)**")
+    print(tables.format_table(['RoomCode', 'NightsBooked', 'Occupancy%'],
+                              [(code, int(row.sum()), round(float(rate) * 100, 1))
+                               for code, row, rate in zip(codes, booked, room_rates)]))
+    if nights <= CALENDAR_GRID_DAYS:
+        print()
+        print_occupancy_grid(codes, booked, start_date)
+
+    print("\n**Occupancy by Night**")
+    print(tables.format_table(['Night', 'Day', 'RoomsBooked', 'Occupancy%'],
+                              [(start_date + datetime.timedelta(days=i),
+                                (start_date + datetime.timedelta(days=i)).strftime('%a'),
+                                int(booked[:, i].sum()), round(float(rate) * 100, 1))
+                               for i, rate in enumerate(day_rates)]))
+    print(f"\nOverall occupancy: {booked.mean():.1%}")
+
+
+PERIOD_PROMPT = "Years (2024 or 2022-2025), dates (YYYY-MM-DD:YYYY-MM-DD) or blank for this year: "
+
+
+def revenue(conn, backend="sql", db_config=None, workers=None, refresh_cache=False):
+    # The current year from the chosen backend, or with db_config (the pool's connection
+    # settings) any years or date range, computed in parallel by revenue_parallel
     print("***RETRIEVING REVENUE REPORT***")
-    if not conn.is_connected():
-        print("Database connection lost. Reconnecting...")
-        conn.reconnect()
-    cursor = None
+    import revenue_engine
     try:
-        query = (f"""
-                WITH RECURSIVE datetable AS (
-                    -- Generate daily dates for the current year dynamically
-                    SELECT DATE_FORMAT(CURDATE(), '%Y-01-01') AS date_value
-                    UNION ALL
-                    SELECT DATE_ADD(date_value, INTERVAL 1 DAY)
-                    FROM datetable
-                    WHERE date_value < DATE_FORMAT(CURDATE(), '%Y-12-31')
-                )
-                SELECT 
-                    revenue_data.RoomName,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 1  THEN daily_revenue ELSE 0 END), 0) AS Jan,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 2  THEN daily_revenue ELSE 0 END), 0) AS Feb,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 3  THEN daily_revenue ELSE 0 END), 0) AS Mar,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 4  THEN daily_revenue ELSE 0 END), 0) AS Apr,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 5  THEN daily_revenue ELSE 0 END), 0) AS May,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 6  THEN daily_revenue ELSE 0 END), 0) AS Jun,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 7  THEN daily_revenue ELSE 0 END), 0) AS Jul,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 8  THEN daily_revenue ELSE 0 END), 0) AS Aug,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 9  THEN daily_revenue ELSE 0 END), 0) AS Sep,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 10 THEN daily_revenue ELSE 0 END), 0) AS Oct,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 11 THEN daily_revenue ELSE 0 END), 0) AS Nov,
-                    ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 12 THEN daily_revenue ELSE 0 END), 0) AS `Dec`,
-                    ROUND(SUM(daily_revenue), 0) AS Total
-                FROM (
-                    -- Calculate per-day revenue for each reservation, adjusting for weekends
-                    SELECT 
-                        dt.date_value AS stay_date,
-                        rooms.RoomName,
-                        ROUND(
-                            CASE 
-                                WHEN WEEKDAY(dt.date_value) IN (5,6) -- Saturday or Sunday
-                                THEN res.Rate * 1.1  -- Weekend rate = 110% of base rate
-                                ELSE res.Rate
-                            END / DATEDIFF(res.CheckOut, res.CheckIn), 2
-                        ) AS daily_revenue
-                    FROM datetable dt
-                    JOIN jthammet.lab7_reservations res 
-                        ON dt.date_value >= res.CheckIn AND dt.date_value < res.CheckOut
-                    JOIN jthammet.lab7_rooms rooms 
-                        ON res.Room = rooms.RoomCode
-                ) revenue_data
-                GROUP BY revenue_data.RoomName
-                ORDER BY Total DESC;
-                    """)
-        cursor = conn.cursor(query)
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-
-        df = pd.DataFrame(rows, columns=columns)
+        if backend == "compare":
+            # Run both engines and report how far apart they are
+            difference = revenue_engine.compare_backends(conn)
+            print(f"Largest difference between SQL and NumPy revenue reports: {difference}")
+            return
+        period = ''
+        if db_config is not None:
+            period = input(PERIOD_PROMPT).strip()
+        if period:
+            import revenue_parallel
+            try:
+                start, end = revenue_parallel.parse_period(period)
+            except ValueError:
+                print("Invalid period, returning home.")
+                return
+            df = revenue_parallel.revenue_by_year(conn, db_config, start, end, workers, refresh_cache)
+        else:
+            df = revenue_engine.revenue_frame(conn, backend)
         print(df.to_string(index=False))
 
     except mysql.connector.Error as err:
         print(f"Database query error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
+
+def print_session_stats():
+    # Per-statement timings for this session, plus how well the caches are doing
+    instrument.print_summary()
+    print("\n**Cache Stats**")
+    for name, entry in cache_stats().items():
+        print(f"{name}: {entry['hits']} hits, {entry['misses']} misses ({entry['hit_rate']:.0%} hit rate), "
+              f"{entry['evictions']} evictions, {entry['size']} entries, TTL {entry['ttl']}s")
+
+
+def offline_menu(snap):
+    # The read-only reports answered from a local snapshot (see snapshot.py) instead of the database
+    import revenue_parallel
+    print(f"Using a snapshot exported {snap.manifest.get('exported_at', 'at an unknown time')}; "
+          f"booking and cancelling need the live database.")
+    while True:
+        print("\nOptions:\n1: Rooms and Rates\n4: Reservation Info\n5: Revenue\n0: Exit\n")
+
+        try:
+            selection = int(input("Selection: "))
+        except ValueError:
+            print("Invalid input. Please enter a number.")
+            continue
+
+        if selection == 0:
+            print("Exiting program.")
+            break
+        if selection == 1:
+            columns, rows = snap.rooms_and_rates_rows()
+            print("\n**Room List Sorted by Popularity:**")
+            print(tables.format_table(columns, rows))
+        elif selection == 4:
+            try:
+                columns, rows = snap.reservation_info(*prompt_reservation_filters())
+            except ValueError:
+                print("Invalid characters used, returning home.")
+                continue
+            print('\n' + tables.format_table(columns, rows) if rows else "No reservations found.")
+        elif selection == 5:
+            print("***RETRIEVING REVENUE REPORT***")
+            period = input(PERIOD_PROMPT).strip()
+            try:
+                start, end = revenue_parallel.parse_period(period)
+            except ValueError:
+                print("Invalid period, returning home.")
+                continue
+            df = snap.revenue_by_year(start, end) if period else snap.revenue_frame()
+            print(df.to_string(index=False))
+        else:
+            print("Invalid selection. Please choose a valid option.")
+
 
 if __name__ == "__main__":
-    conn = get_db_connection()  # Open connection once at the start
+    parser = argparse.ArgumentParser(description="LabThreeSixFive reservation system")
+    parser.add_argument("--host", default=os.environ.get("LAB7_DB_HOST", "mysql.labthreesixfive.com"),
+                        help="database server (default: $LAB7_DB_HOST or the labthreesixfive server)")
+    parser.add_argument("--database", default=os.environ.get("LAB7_DB_NAME", "jthammet"),
+                        help="database holding lab7_rooms and lab7_reservations (default: $LAB7_DB_NAME or jthammet)")
+    parser.add_argument("--index", action="store_true",
+                        help="answer availability checks from an in-memory reservation index")
+    parser.add_argument("--revenue-backend", choices=REVENUE_BACKENDS + ("compare",), default="sql",
+                        help="engine used for the revenue report, or 'compare' to cross-check them")
+    parser.add_argument("--revenue-workers", type=int, default=None,
+                        help="processes used for multi-year revenue reports (default: one per CPU)")
+    parser.add_argument("--refresh-revenue-cache", action="store_true",
+                        help="recompute past years in revenue reports instead of reading them from .revenue_cache")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                        help="rows per page when listing every reservation")
+    parser.add_argument("--keyset-pages", action="store_true",
+                        help="page through every reservation with CODE > last_seen queries instead of one cursor")
+    parser.add_argument("--query-log", metavar="FILE",
+                        help="append a JSON line per SQL statement (shape, time, rows, bytes) to FILE")
+    parser.add_argument("--slow-query-ms", type=float, default=instrument.SLOW_QUERY_SECONDS * 1000,
+                        help="statements at least this slow are flagged in the query log and stats")
+    parser.add_argument("--explain-slow", action="store_true",
+                        help="capture EXPLAIN output for slow SELECTs in the query log")
+    parser.add_argument("--migrate", action="store_true",
+                        help="apply pending schema migrations (guest name indexes, see migrations.py) and exit")
+    parser.add_argument("--rebuild-revenue-summary", action="store_true",
+                        help="rebuild the room_month_revenue table from every reservation and exit")
+    parser.add_argument("--verify-revenue-summary", action="store_true",
+                        help="check room_month_revenue against the SQL revenue report and exit")
+    parser.add_argument("--export", metavar="DIR",
+                        help="export lab7_rooms and lab7_reservations to a snapshot in DIR and exit; "
+                             "only reservations added since the last export are read")
+    parser.add_argument("--export-format", choices=("arrow", "parquet", "csv"),
+                        help="snapshot file format (default: arrow, or gzipped csv without pyarrow)")
+    parser.add_argument("--full-export", action="store_true",
+                        help="re-export every reservation, picking up cancellations and edits")
+    parser.add_argument("--snapshot", metavar="DIR",
+                        help="run the reports from a snapshot made with --export instead of the database")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run reserve/cancel/info requests from a CSV or JSONL file instead of the menu")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="requests written per commit in batch mode")
+    args = parser.parse_args()
+
+    instrument.SLOW_QUERY_SECONDS = args.slow_query_ms / 1000
+    instrument.EXPLAIN_SLOW_QUERIES = args.explain_slow
+    if args.query_log:
+        handler = logging.FileHandler(args.query_log)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        instrument.log.addHandler(handler)
+        instrument.log.setLevel(logging.INFO)
+        instrument.log.propagate = False
+
+    if args.snapshot:
+        import snapshot
+        try:
+            snap = snapshot.Snapshot.load(args.snapshot)
+        except (OSError, ValueError) as err:
+            print(f"Could not load snapshot: {err}")
+            exit(1)
+        offline_menu(snap)
+        exit()
+
+    # Open the connection pool once at the start. Only the interactive menu defers connecting;
+    # the one-shot commands below connect right away anyway, so they check the login here.
+    one_shot = (args.migrate or args.rebuild_revenue_summary or args.verify_revenue_summary or args.export
+                or args.batch or args.index)
+    pool = get_db_pool(args.host, args.database, lazy=not one_shot)
 
-    if conn is None:
+    if pool is None:
         print("Database connection failed. Exiting...")
         exit()
 
-    try:
-        while True:
-            print("\nOptions:\n1: Rooms and Rates\n2: Reservations\n3: Cancel Reservation\n4: Reservation Info\n5: Revenue\n0: Exit\n")
+    if args.migrate:
+        with pool.connection() as conn:
+            ran = migrations.migrate(conn)
+        print(f"Applied migrations: {', '.join(ran)}" if ran else "Schema is up to date.")
+        exit()
 
-            try:
-                selection = int(input("Selection: "))
-            except ValueError:
-                print("Invalid input. Please enter a number.")
-                continue  # Restart loop
-
-            if selection == 1:
-                get_rooms_and_rates(conn)  # Pass connection (not reopening it)
-            elif selection == 2:
-                make_reservation(conn)
-            elif selection == 3:
-                cancel_reservation(conn)
-            elif selection == 4:
-                reservation_info(conn)
-            elif selection == 5:
-                revenue(conn)
-            elif selection == 0:
-                print("Exiting program.")
-                break 
-            else:
-                print("Invalid selection. Please choose a valid option.")
-    finally:
-        conn.close()  #Close connection only when user exits
-        print("Database connection closed.")
+    if args.rebuild_revenue_summary:
+        import revenue_summary
+        with pool.connection() as conn:
+            revenue_summary.rebuild(conn)
+        print("Revenue summary rebuilt.")
+        exit()
+
+    if args.verify_revenue_summary:
+        import revenue_summary
+        with pool.connection() as conn:
+            mismatched = revenue_summary.verify(conn)
+        if mismatched:
+            print(f"Revenue summary differs from the revenue report for: {', '.join(mismatched)}")
+            print("Run with --rebuild-revenue-summary to rebuild it.")
+            exit(1)
+        print("Revenue summary matches the revenue report.")
+        exit()
+
+    if args.export:
+        import export
+        with pool.connection() as conn:
+            manifest = export.export_snapshot(conn, args.export, args.export_format, not args.full_export)
+        print(f"Snapshot in {args.export}: {len(manifest['reservations'])} reservation files "
+              f"({manifest['format']}), up to CODE {manifest['last_code']}")
+        exit()
+
+    if args.batch:
+        import batch
+        with pool.connection() as conn:
+            batch.run_file(instrument.InstrumentedConnection(conn), args.batch, args.batch_size)
+        instrument.print_summary()
+        exit()
+
+    index = None
+    if args.index:
+        from occupancy import OccupancyIndex
+        index = pool.run(OccupancyIndex.load)  # Loaded once, kept current by booking and cancelling
+
+    while True:
+        print("\nOptions:\n1: Rooms and Rates\n2: Reservations\n3: Cancel Reservation\n4: Reservation Info\n5: Revenue\n6: Query Stats\n7: Occupancy Calendar\n0: Exit\n")
+
+        try:
+            selection = int(input("Selection: "))
+        except ValueError:
+            print("Invalid input. Please enter a number.")
+            continue  # Restart loop
+
+        if selection == 0:
+            print("Exiting program.")
+            break
+        if selection == 6:
+            print_session_stats()
+            continue
+        if selection not in (1, 2, 3, 4, 5, 7):
+            print("Invalid selection. Please choose a valid option.")
+            continue
+
+        # Each action borrows a pooled connection and hands it back when done
+        try:
+            with pool.connection() as conn:
+                conn = instrument.InstrumentedConnection(conn)  # Time every statement the action runs
+                if selection == 1:
+                    get_rooms_and_rates(conn)
+                elif selection == 2:
+                    make_reservation(conn, index)
+                elif selection == 3:
+                    cancel_reservation(conn, index)
+                elif selection == 4:
+                    reservation_info(conn, args.page_size, args.keyset_pages)
+                elif selection == 5:
+                    revenue(conn, args.revenue_backend, pool.config, args.revenue_workers,
+                            args.refresh_revenue_cache)
+                elif selection == 7:
+                    occupancy_calendar_view(conn, index)
+        except mysql.connector.Error as err:
+            if login_rejected(err):
+                print(f"The database rejected the login: {err}")
+                print("Restart and check the user, password and --database. Exiting...")
+                exit(1)
+            print(f"Database connection error: {err}")
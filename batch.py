@@ -0,0 +1,249 @@
+import csv
+import datetime
+import json
+import time
+
+import mysql.connector
+
+import migrations
+import queries
+import revenue_summary
+from Lab7 import BOOK_ROOM_QUERY, find_available_rooms, invalidate_reservation_caches
+from pricing import price_stay
+from occupancy import OccupancyIndex
+
+# Non-interactive batch mode: replays a CSV or JSONL file of reserve, cancel and info
+# requests through the same availability, pricing and lookup logic as the menu.
+#
+# Columns (JSON keys) by op:
+#   reserve: first_name, last_name, room, bed_type, begin, end, adults, kids
+#   cancel:  code, first_name, last_name
+#   info:    first_name, last_name, begin, end, room, code
+
+DELETE_RESERVATION = "DELETE FROM lab7_reservations WHERE CODE = %s"
+
+
+def read_requests(path):
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def field(request, name):
+    value = request.get(name)
+    return '' if value is None else str(value).strip()
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class BatchRunner:
+
+    def __init__(self, conn, batch_size=500):
+        self.conn = conn
+        self.cursor = conn.cursor(buffered=True)
+        self.batch_size = batch_size
+        self.pending_inserts = []  # (line, (room, begin, end, cost, last name, first name, adults, kids))
+        self.pending_deletes = []  # (line, code, first name, last name)
+        self.pending = OccupancyIndex()  # stays booked by the not yet flushed inserts
+        self.counts = {'reserve': 0, 'cancel': 0, 'info': 0}
+        self.errors = []  # (line, message)
+        self.processed = 0
+
+    def run(self, requests):
+        start = time.perf_counter()
+        for line, request in enumerate(requests, start=1):
+            self.processed += 1
+            op = field(request, 'op').lower()
+            try:
+                if op == 'reserve':
+                    self.reserve(line, request)
+                elif op == 'cancel':
+                    self.cancel(line, request)
+                elif op == 'info':
+                    self.info(line, request)
+                else:
+                    raise ValueError(f"Unknown op '{op}'")
+            except (ValueError, KeyError, mysql.connector.Error) as err:
+                self.errors.append((line, str(err)))
+
+            if len(self.pending_inserts) + len(self.pending_deletes) >= self.batch_size:
+                self.flush()
+        self.flush()
+        self.cursor.close()
+        return time.perf_counter() - start
+
+    def reserve(self, line, request):
+        first_name = field(request, 'first_name')
+        last_name = field(request, 'last_name')
+        room_preference = (field(request, 'room') or 'Any').upper()
+        bed_type = (field(request, 'bed_type') or 'Any').capitalize()
+        start_date = parse_date(field(request, 'begin'))
+        end_date = parse_date(field(request, 'end'))
+        if start_date >= end_date:
+            raise ValueError("Invalid date range. Start date must be before end date.")
+        adults = int(field(request, 'adults') or 1)
+        kids = int(field(request, 'kids') or 0)
+
+        # Apply queued cancellations first so the rooms they free up can be booked
+        if self.pending_deletes:
+            self.flush()
+
+        rooms = find_available_rooms(self.cursor, adults + kids, room_preference, bed_type, start_date, end_date)
+        rooms = self.pending.available(rooms, start_date, end_date)
+        if not rooms:
+            raise ValueError("No suitable rooms available")
+
+        room = rooms[0]
+        total_cost = price_stay(room[5], start_date, end_date)
+        self.pending_inserts.append(
+            (line, (room[0], start_date, end_date, total_cost, last_name, first_name, adults, kids)))
+        self.pending.add(-line, room[0], start_date, end_date)
+        self.counts['reserve'] += 1
+
+    def cancel(self, line, request):
+        code = int(field(request, 'code'))
+        first_name = field(request, 'first_name').capitalize()
+        last_name = field(request, 'last_name').capitalize()
+        self.pending_deletes.append((line, code, first_name, last_name))  # Counted once flush deletes it
+
+    def info(self, line, request):
+        shape, query, params = queries.reservation_info_statement(
+            field(request, 'first_name'), field(request, 'last_name'), field(request, 'begin'),
+            field(request, 'end'), field(request, 'room'), field(request, 'code'),
+            reversed_names=migrations.reversed_names(self.conn))
+        columns, rows = queries.fetch(self.conn, (shape, query), params)
+        print(f"Row {line}: {len(rows)} reservations found")
+        self.counts['info'] += 1
+
+    def owned_codes(self, cancels):
+        # Owner and stay of each reservation in the cancellations, fetched with one query and
+        # locked until the write transaction ends, so nothing else can cancel them meanwhile
+        codes = sorted({code for _, code, _, _ in cancels})
+        placeholders = ', '.join(['%s'] * len(codes))
+        self.cursor.execute(f"""
+            SELECT CODE, FirstName, LastName, Room, CheckIn, Checkout, Rate
+            FROM lab7_reservations WHERE CODE IN ({placeholders})
+            ORDER BY CODE FOR UPDATE
+        """, codes)
+        return {row[0]: ((row[1].lower(), row[2].lower()), row[3:]) for row in self.cursor.fetchall()}
+
+    def cancel_owned(self, cancels):
+        # Deletes the queued cancellations whose reservation belongs to the requester, each code
+        # once. Returns (deleted rows, (line, message) failures); only the deleted rows' stays
+        # may be taken out of the revenue summary.
+        owners = self.owned_codes(cancels)
+        deleted, failures, done = [], [], set()
+        for line, code, first_name, last_name in cancels:
+            owner, stay = owners.get(code, (None, None))
+            if code in done:
+                failures.append((line, f"The reservation with code {code} was already cancelled in this batch."))
+                continue
+            if owner == (first_name.lower(), last_name.lower()):
+                self.cursor.execute(DELETE_RESERVATION, (code,))
+                if self.cursor.rowcount:
+                    deleted.append((line, (code,), stay))
+                    done.add(code)
+                    continue
+            failures.append((line, f"The reservation with code {code} was not found under your name."))
+        return deleted, failures
+
+    def book(self, inserts):
+        # Books the queued stays the way book_room does: locks their rooms, then inserts each
+        # stay only if its room is still free. Returns (booked rows, lines that lost the room).
+        rooms = sorted({params[0] for _, params, _ in inserts})  # One lock order, no deadlocks
+        placeholders = ', '.join(['%s'] * len(rooms))
+        self.cursor.execute(f"SELECT RoomCode FROM lab7_rooms WHERE RoomCode IN ({placeholders}) "
+                            f"ORDER BY RoomCode FOR UPDATE", rooms)
+        self.cursor.fetchall()
+
+        booked, conflicts = [], []
+        for line, params, stay in inserts:
+            room, start_date, end_date = params[:3]
+            self.cursor.execute(BOOK_ROOM_QUERY, params[1:] + (room, start_date, start_date, end_date, end_date,
+                                                               start_date, end_date))
+            if self.cursor.rowcount == 0:
+                conflicts.append(line)
+            else:
+                booked.append((line, params, stay))
+        return booked, conflicts
+
+    def record_conflicts(self, lines):
+        for line in lines:
+            self.errors.append((line, "The room was booked by someone else for those dates."))
+            self.counts['reserve'] -= 1
+
+    def flush(self):
+        # Writes the queued cancellations and bookings, each under its row or room locks, and
+        # commits them together. If the batch fails it is rolled back and replayed row by row
+        # to isolate the bad rows.
+        cancels = self.pending_deletes
+        inserts = [(line, params, params[:4]) for line, params in self.pending_inserts]
+
+        self.pending_deletes = []
+        self.pending_inserts = []
+        self.pending = OccupancyIndex()
+        if not cancels and not inserts:
+            return
+
+        if self.conn.in_transaction:
+            self.conn.commit()  # End the availability reads so the writes start a fresh transaction
+        try:
+            deletes, failures = self.cancel_owned(cancels) if cancels else ([], [])
+            booked, conflicts = self.book(inserts) if inserts else ([], [])
+            # One summary update for the whole batch, netting cancellations against bookings
+            if revenue_summary.is_enabled(self.cursor):
+                deltas = revenue_summary.stay_deltas([stay for _, _, stay in deletes], sign=-1)
+                revenue_summary.stay_deltas([stay for _, _, stay in booked], deltas=deltas)
+                revenue_summary.apply_deltas(self.cursor, deltas)
+            self.conn.commit()
+            self.counts['cancel'] += len(deletes)
+            self.errors.extend(failures)
+            self.record_conflicts(conflicts)
+        except mysql.connector.Error:
+            self.conn.rollback()
+            self.replay(cancels, inserts)
+        invalidate_reservation_caches()
+
+    def replay(self, cancels, inserts):
+        # One transaction per request, so only the rows that fail again are reported
+        requests = [(-1, row) for row in cancels] + [(1, row) for row in inserts]
+        for sign, row in requests:
+            try:
+                if sign < 0:
+                    done, failures = self.cancel_owned([row])
+                    conflicts = []
+                else:
+                    done, conflicts = self.book([row])
+                    failures = []
+                revenue_summary.apply_stays(self.cursor, [stay for _, _, stay in done], sign)
+                self.conn.commit()
+                if sign < 0:
+                    self.counts['cancel'] += len(done)
+                self.errors.extend(failures)
+                self.record_conflicts(conflicts)
+            except mysql.connector.Error as err:
+                self.conn.rollback()
+                self.errors.append((row[0], str(err)))
+
+    def report(self, elapsed):
+        rate = self.processed / elapsed if elapsed else 0
+        print(f"\nProcessed {self.processed} requests in {elapsed:.2f}s ({rate:.1f} ops/sec)")
+        print(f"Reservations: {self.counts['reserve']}, Cancellations: {self.counts['cancel']}, "
+              f"Lookups: {self.counts['info']}")
+        if self.errors:
+            print(f"{len(self.errors)} rows failed:")
+            for line, message in sorted(self.errors):
+                print(f"  Row {line}: {message}")
+
+
+def run_file(conn, path, batch_size=500):
+    runner = BatchRunner(conn, batch_size)
+    elapsed = runner.run(read_requests(path))
+    runner.report(elapsed)
+    return runner
@@ -0,0 +1,73 @@
+import argparse
+import datetime
+import threading
+
+import mysql.connector
+
+from Lab7 import book_room
+from benchmarks import synthetic
+
+# Fires many simultaneous bookings of the same room and dates at a local stand-in
+# database and checks that exactly one of them wins.
+# Run from the repo root: python -m benchmarks.booking_race; tests/test_booking_race.py runs
+# it too when LAB7_BENCH_HOST names a stand-in database.
+
+
+def race(args, clients):
+    # Seeds the stand-in database, books one room for the same dates from `clients` threads at
+    # once and returns (winning codes, bookings stored for those dates, errors)
+    setup = synthetic.connect(args)
+    synthetic.seed(setup, 1000, num_rooms=10)
+    setup.close()
+
+    room = 'R0000'
+    start_date = datetime.date.today() + datetime.timedelta(days=3650)  # Past any seeded stay
+    end_date = start_date + datetime.timedelta(days=3)
+
+    barrier = threading.Barrier(clients)
+    codes = []
+    errors = []
+
+    def client(i):
+        conn = synthetic.connect(args)
+        try:
+            barrier.wait()  # Release every client at once
+            code = book_room(conn, room, start_date, end_date, 300, 'RACE', f'CLIENT{i}', 1, 0)
+            if code is not None:
+                codes.append(code)
+        except mysql.connector.Error as err:
+            errors.append(err)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    check = synthetic.connect(args)
+    cursor = check.cursor()
+    cursor.execute("SELECT COUNT(*) FROM lab7_reservations WHERE Room = %s AND CheckIn = %s", (room, start_date))
+    stored = cursor.fetchone()[0]
+    check.close()
+    return codes, stored, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking race check")
+    synthetic.add_connection_args(parser)
+    parser.add_argument('--clients', type=int, default=20)
+    args = parser.parse_args()
+
+    codes, stored, errors = race(args, args.clients)
+    print(f"{args.clients} clients: {len(codes)} won, {stored} stored, {len(errors)} errors")
+    for err in errors:
+        print(f"  {err}")
+    if len(codes) != 1 or stored != 1:
+        raise SystemExit("FAILED: expected exactly one booking to win")
+    print("OK: exactly one booking won")
+
+
+if __name__ == "__main__":
+    main()
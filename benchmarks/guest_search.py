@@ -0,0 +1,100 @@
+import argparse
+import json
+
+import migrations
+import queries
+from benchmarks import synthetic
+from benchmarks.run import measure
+
+# Guest-name lookups before and after the migrations in migrations.py: seeds a stand-in
+# database, gives the guests distinct names, times each lookup and records the access path
+# from EXPLAIN, then applies the migrations and does the same again.
+# Run from the repo root: python -m benchmarks.guest_search --reservations 100000
+
+LOOKUPS = {
+    # name: (firstname, lastname) filters for reservation_info, or the cancel lookup
+    'cancel_lookup': ('FRIEDA17', 'SMITH123'),
+    'last_name': ('', 'SMITH123'),
+    'first_name': ('FRIEDA17', ''),
+    'last_name_prefix': ('', 'SMITH12%'),
+    'last_name_suffix': ('', '%H123'),
+    'first_name_suffix': ('%A17', ''),
+    'last_name_infix': ('', '%ITH12%'),
+}
+
+
+def diversify_names(conn):
+    # The synthetic generator draws from ten names; suffix them so lookups are selective
+    cursor = conn.cursor()
+    cursor.execute("UPDATE lab7_reservations SET LastName = CONCAT(LastName, CODE % 997), "
+                   "FirstName = CONCAT(FirstName, CODE % 101)")
+    conn.commit()
+    cursor.close()
+
+
+def statement(name, reversed_names):
+    firstname, lastname = LOOKUPS[name]
+    if name == 'cancel_lookup':
+        return queries.CANCEL_LOOKUP[1], [firstname, lastname]
+    _, sql, params = queries.reservation_info_statement(firstname, lastname, reversed_names=reversed_names)
+    return sql, params
+
+
+def access_path(conn, sql, params):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + sql, params)
+    plan = cursor.fetchall()[0]
+    cursor.close()
+    return {'type': plan.get('type'), 'key': plan.get('key'), 'rows': plan.get('rows')}
+
+
+def run_lookups(conn, repeats, reversed_names):
+    results = {}
+    cursor = conn.cursor()
+
+    for name in LOOKUPS:
+        sql, params = statement(name, reversed_names)
+
+        def lookup():
+            cursor.execute(sql, params)
+            cursor.fetchall()
+
+        results[name] = measure(lookup, repeats)
+        results[name]['plan'] = access_path(conn, sql, params)
+        plan = results[name]['plan']
+        print(f"  {name:<18} median {results[name]['median_s']:.4f}s  {plan['type']} via {plan['key']}")
+    cursor.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark guest-name lookups before and after the name indexes")
+    synthetic.add_connection_args(parser)
+    parser.add_argument('--reservations', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    conn = synthetic.connect(args)
+    print(f"Seeding {args.reservations} reservations...")
+    synthetic.seed(conn, args.reservations)
+    diversify_names(conn)
+
+    print("Before migrations:")
+    before = run_lookups(conn, args.repeats, reversed_names=False)
+    print(f"Applied {', '.join(migrations.migrate(conn))}")
+    print("After migrations:")
+    after = run_lookups(conn, args.repeats, reversed_names=migrations.reversed_names(conn))
+    conn.close()
+
+    for name in LOOKUPS:
+        print(f"  {name:<18} {before[name]['median_s'] / after[name]['median_s']:6.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'reservations': args.reservations, 'before': before, 'after': after}, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import statistics
+import time
+
+from Lab7 import ROOMS_AND_RATES_QUERY
+from benchmarks import synthetic
+
+# Compares the grouped rooms-and-rates query with the original correlated-subquery version.
+# Run from the repo root: python -m benchmarks.rooms_and_rates
+
+CORRELATED_QUERY = """
+    SELECT
+        r.RoomCode,
+        r.RoomName,
+        r.Beds,
+        r.bedType,
+        r.maxOcc,
+        r.basePrice,
+        r.decor,
+
+        ROUND(
+            (SELECT COUNT(*)
+             FROM lab7_reservations res
+             WHERE res.Room = r.RoomCode
+               AND res.CheckIn >= (SELECT CURDATE() - 180)
+            ) / 180, 2
+        ) AS popularity_score,
+
+        (SELECT MIN(CheckIn)
+         FROM lab7_reservations res
+         WHERE res.Room = r.RoomCode
+           AND res.CheckIn >= CURDATE()
+        ) AS next_available_checkin,
+
+        (SELECT DATEDIFF(MAX(Checkout), MIN(CheckIn))
+         FROM lab7_reservations res
+         WHERE res.Room = r.RoomCode
+         GROUP BY res.Room
+        ) AS last_stay_length,
+
+        (SELECT MAX(Checkout)
+         FROM lab7_reservations res
+         WHERE res.Room = r.RoomCode
+         GROUP BY res.Room
+        ) AS last_checkout_date
+
+    FROM lab7_rooms r
+    ORDER BY popularity_score DESC;
+"""
+
+
+def time_query(conn, query, repeats):
+    # Median wall time of `repeats` runs, plus the rows of the last run
+    timings = []
+    rows = None
+    cursor = conn.cursor()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+    cursor.close()
+    return statistics.median(timings), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rooms-and-rates report")
+    synthetic.add_connection_args(parser)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = synthetic.connect(args)
+    print(f"{'reservations':>12} {'correlated (s)':>15} {'grouped (s)':>12} {'speedup':>8}")
+    for scale in args.scales:
+        synthetic.seed(conn, scale, num_rooms=args.rooms)
+        old_time, old_rows = time_query(conn, CORRELATED_QUERY, args.repeats)
+        new_time, new_rows = time_query(conn, ROOMS_AND_RATES_QUERY, args.repeats)
+
+        # Ties in popularity can come back in either order, so compare as sets
+        if set(old_rows) != set(new_rows):
+            print(f"WARNING: results differ at {scale} reservations")
+        print(f"{scale:>12} {old_time:>15.4f} {new_time:>12.4f} {old_time / new_time:>7.1f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+
+import Lab7
+import queries
+import revenue_engine
+import revenue_parallel
+from benchmarks import synthetic
+
+# Times the main report and search paths of Lab7.py against a local stand-in database
+# seeded at several scales, and writes a JSON report that can be diffed between versions.
+# Run from the repo root: python -m benchmarks.run --scales 10000 100000 --output bench_report.json
+
+
+def measure(operation, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'median_s': statistics.median(timings),
+        'p95_s': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'min_s': timings[0],
+        'runs': repeats,
+    }
+
+
+def benchmark_scale(conn, config, repeats, rng):
+    results = {}
+    cursor = conn.cursor(buffered=True)
+    today = datetime.date.today()
+    stays = []
+    for _ in range(repeats):
+        start = today + datetime.timedelta(days=rng.randint(-365, 365))
+        stays.append((start, start + datetime.timedelta(days=rng.randint(1, 7))))
+
+    def rooms_and_rates():
+        Lab7.report_cache.clear()  # Measure the query, not the cache
+        Lab7.rooms_and_rates_frame(conn)
+
+    def search_cold():
+        Lab7.room_cache.clear()
+        start, end = rng.choice(stays)
+        Lab7.find_available_rooms(cursor, 2, 'ANY', 'Any', start, end)
+
+    def search_warm():
+        start, end = rng.choice(stays)
+        Lab7.find_available_rooms(cursor, 2, 'ANY', 'Any', start, end)
+
+    def lookup(*filters):
+        def run():
+            shape, sql, params = queries.reservation_info_statement(*filters)
+            queries.fetch(conn, (shape, sql), params)
+        return run
+
+    def stream_all():
+        for _ in Lab7.stream_reservations(conn, page_size=1000):
+            pass
+
+    operations = {
+        'rooms_and_rates': rooms_and_rates,
+        'search_cold_cache': search_cold,
+        'search_warm_cache': search_warm,
+        'info_last_name': lookup('', 'SMITH'),
+        'info_name_pattern': lookup('AL%', ''),
+        'info_date': lookup('', '', today.isoformat()),
+        'info_stream_all': stream_all,
+        'revenue_sql': lambda: revenue_engine.sql_revenue_frame(conn),
+        'revenue_numpy': lambda: revenue_engine.numpy_revenue_frame(conn),
+        'occupancy_calendar_year': lambda: Lab7.occupancy_calendar_data(
+            conn, today, today + datetime.timedelta(days=365)),
+        # Three years across worker processes, recomputing past years rather than reading the cache
+        'revenue_parallel_3y': lambda: revenue_parallel.revenue_by_year(
+            conn, config, datetime.date(today.year - 2, 1, 1), datetime.date(today.year + 1, 1, 1), refresh=True),
+    }
+    for name, operation in operations.items():
+        results[name] = measure(operation, repeats)
+        print(f"  {name:<20} median {results[name]['median_s']:.4f}s")
+    cursor.close()
+    return results
+
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(report, baseline_path, tolerance):
+    # Prints every operation whose median got slower than the baseline by more than `tolerance`
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = 0
+    for scale, operations in report['scales'].items():
+        for name, result in operations.items():
+            before = baseline['scales'].get(scale, {}).get(name)
+            if before and result['median_s'] > before['median_s'] * (1 + tolerance):
+                regressions += 1
+                print(f"REGRESSION {name} at {scale} reservations: "
+                      f"{before['median_s']:.4f}s -> {result['median_s']:.4f}s")
+    if not regressions:
+        print(f"No regressions against {baseline['version']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Lab7 against a synthetic stand-in database")
+    synthetic.add_connection_args(parser)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--output', default='bench_report.json')
+    parser.add_argument('--baseline', help="earlier report to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown against the baseline before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    conn = synthetic.connect(args)
+    config = {'host': args.host, 'port': args.port, 'user': args.user, 'password': args.password,
+              'database': args.database}
+    report = {
+        'version': git_version(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'rooms': args.rooms,
+        'scales': {},
+    }
+    for scale in args.scales:
+        print(f"Seeding {scale} reservations...")
+        synthetic.seed(conn, scale, num_rooms=args.rooms)
+        report['scales'][str(scale)] = benchmark_scale(conn, config, args.repeats, random.Random(scale))
+    conn.close()
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline and compare(report, args.baseline, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import time
+
+import db
+import service
+from benchmarks import synthetic
+
+# Load test for service.py: seeds a local stand-in database, serves it in-process and
+# drives it with an increasing number of concurrent keep-alive clients issuing a mix of
+# room reports, availability searches, guest lookups and bookings. Reports p50/p99 latency
+# and throughput per client count, and 503s from the concurrency limit.
+# Run from the repo root: python -m benchmarks.service_load --clients 1 8 32 128
+
+
+def percentile(timings, fraction):
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def request_mix(rng, today, book_fraction):
+    # (method, path, body) for one randomly chosen operation
+    start = today + datetime.timedelta(days=rng.randint(-365, 365))
+    end = start + datetime.timedelta(days=rng.randint(1, 7))
+    roll = rng.random()
+    if roll < book_fraction:
+        # Far enough ahead that bookings don't collide with the seeded stays
+        checkin = today + datetime.timedelta(days=rng.randint(3650, 7300))
+        body = {'room': f"R{rng.randrange(10):04d}", 'checkin': checkin.isoformat(),
+                'checkout': (checkin + datetime.timedelta(days=2)).isoformat(),
+                'firstname': 'Load', 'lastname': 'Test', 'adults': 1, 'kids': 0}
+        return 'POST', '/reservations', json.dumps(body).encode()
+    roll = rng.random()
+    if roll < 0.2:
+        return 'GET', '/rooms', b''
+    if roll < 0.7:
+        return 'GET', f'/availability?checkin={start}&checkout={end}&guests=2', b''
+    return 'GET', f"/reservations?lastname={rng.choice(synthetic.LAST_NAMES)}", b''
+
+
+async def client(host, port, requests, timings, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for method, path, body in requests:
+            start = time.perf_counter()
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            timings.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_level(host, port, clients, per_client, rng, book_fraction):
+    today = datetime.date.today()
+    timings = []
+    statuses = {}
+    plans = [[request_mix(rng, today, book_fraction) for _ in range(per_client)] for _ in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, plan, timings, statuses) for plan in plans))
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        'clients': clients,
+        'requests': len(timings),
+        'p50_s': percentile(timings, 0.50),
+        'p99_s': percentile(timings, 0.99),
+        'throughput_rps': len(timings) / elapsed,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def load_test(args, pool):
+    reservations = service.ReservationService(pool, args.workers, args.max_pending)
+    server = await asyncio.start_server(lambda r, w: service.handle_client(reservations, r, w), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    rng = random.Random(2025)
+    results = []
+    try:
+        for clients in args.clients:
+            result = await run_level('127.0.0.1', port, clients, args.requests, rng, args.book_fraction)
+            results.append(result)
+            print(f"  {clients:>4} clients  p50 {result['p50_s'] * 1000:8.2f}ms  p99 {result['p99_s'] * 1000:8.2f}ms"
+                  f"  {result['throughput_rps']:8.1f} req/s  {result['statuses']}")
+    finally:
+        server.close()
+        await server.wait_closed()
+        reservations.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the reservation service at increasing client counts")
+    synthetic.add_connection_args(parser)
+    parser.add_argument('--reservations', type=int, default=10000)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--requests', type=int, default=50, help="requests sent by each client")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--max-pending', type=int, default=256)
+    parser.add_argument('--book-fraction', type=float, default=0.05,
+                        help="share of requests that are bookings")
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    setup = synthetic.connect(args)
+    print(f"Seeding {args.reservations} reservations...")
+    synthetic.seed(setup, args.reservations, num_rooms=10)
+    setup.close()
+
+    pool = db.ConnectionPool(size=args.workers, host=args.host, port=args.port, user=args.user,
+                             password=args.password, database=args.database)
+    results = asyncio.run(load_test(args, pool))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'reservations': args.reservations, 'workers': args.workers, 'levels': results}, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+# Startup cost of the CLI measured with python -X importtime: imports `Lab7` in a fresh
+# interpreter several times and reports the median total import time and the modules that
+# cost the most. --compare REF measures the same for an earlier git revision alongside.
+# Needs no database. Run from the repo root: python -m benchmarks.startup --compare HEAD~1
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(directory, module):
+    # ({module: cumulative microseconds}, modules imported directly by `module`) from one
+    # fresh interpreter. importtime indents each module two spaces per level of nesting.
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=directory, capture_output=True, text=True, check=True)
+    times = {}
+    direct = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+        if len(name) - len(name.lstrip()) == 3:  # One space after the bar, then one level
+            direct.append(name.strip())
+    return times, direct
+
+
+def measure(directory, module, repeats, top):
+    runs = [import_times(directory, module) for _ in range(repeats)]
+    total = statistics.median(times[module] for times, _ in runs)
+    # Only the module's own imports, so nested modules aren't counted twice
+    heaviest = {}
+    for name in runs[0][1]:
+        heaviest[name] = statistics.median(times.get(name, 0) for times, _ in runs)
+    ranked = sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {'total_ms': total / 1000, 'heaviest': {name: us / 1000 for name, us in ranked}}
+
+
+def checkout(ref, directory):
+    # Exports the tree at `ref` without touching the working copy
+    archive = subprocess.run(['git', 'archive', ref], cwd=ROOT, capture_output=True, check=True).stdout
+    path = os.path.join(directory, 'archive.tar')
+    with open(path, 'wb') as f:
+        f.write(archive)
+    with tarfile.open(path) as tar:
+        tar.extractall(directory)
+
+
+def report(label, result):
+    print(f"{label}: import Lab7 {result['total_ms']:.1f}ms")
+    for name, ms in result['heaviest'].items():
+        print(f"  {name:<24} {ms:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI startup with python -X importtime")
+    parser.add_argument('--module', default='Lab7')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help="heaviest imports to list")
+    parser.add_argument('--compare', metavar='REF', help="git revision to measure as the baseline")
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    results = {'current': measure(ROOT, args.module, args.repeats, args.top)}
+    if args.compare:
+        with tempfile.TemporaryDirectory() as directory:
+            checkout(args.compare, directory)
+            results[args.compare] = measure(directory, args.module, args.repeats, args.top)
+        report(args.compare, results[args.compare])
+    report('current', results['current'])
+    if args.compare:
+        before, after = results[args.compare]['total_ms'], results['current']['total_ms']
+        print(f"Startup import time {before:.1f}ms -> {after:.1f}ms ({before / after:.1f}x faster)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import datetime
+import os
+import random
+
+import mysql.connector
+
+# Synthetic stand-in for the labthreesixfive tables, for benchmarking on a local MySQL/MariaDB.
+# Lab7.py uses the connection's default database, so any database name works here.
+
+PRODUCTION_HOST = 'mysql.labthreesixfive.com'
+
+ROOMS_DDL = """
+    CREATE TABLE lab7_rooms (
+        RoomCode CHAR(5) PRIMARY KEY,
+        RoomName VARCHAR(30) NOT NULL,
+        Beds INT NOT NULL,
+        bedType VARCHAR(8) NOT NULL,
+        maxOcc INT NOT NULL,
+        basePrice DECIMAL(6,2) NOT NULL,
+        decor VARCHAR(20) NOT NULL
+    )
+"""
+
+RESERVATIONS_DDL = """
+    CREATE TABLE lab7_reservations (
+        CODE INT AUTO_INCREMENT PRIMARY KEY,
+        Room CHAR(5) NOT NULL,
+        CheckIn DATE NOT NULL,
+        Checkout DATE NOT NULL,
+        Rate DECIMAL(8,2) NOT NULL,
+        LastName VARCHAR(15) NOT NULL,
+        FirstName VARCHAR(15) NOT NULL,
+        Adults INT NOT NULL,
+        Kids INT NOT NULL,
+        FOREIGN KEY (Room) REFERENCES lab7_rooms (RoomCode)
+    )
+"""
+
+BED_TYPES = ['King', 'Queen', 'Double']
+DECORS = ['modern', 'traditional', 'rustic', 'bohemian']
+FIRST_NAMES = ['ALBERT', 'BETTY', 'CARLOS', 'DIANA', 'EMIL', 'FRIEDA', 'GRANT', 'HOLLY', 'IVAN', 'JUNE']
+LAST_NAMES = ['SMITH', 'JONES', 'GARCIA', 'NGUYEN', 'MILLER', 'DAVIS', 'LOPEZ', 'WILSON', 'MOORE', 'TAYLOR']
+
+
+def add_connection_args(parser):
+    # Connection settings shared by the benchmark scripts
+    parser.add_argument('--host', default=os.environ.get('LAB7_BENCH_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('LAB7_BENCH_PORT', 3306)))
+    parser.add_argument('--user', default=os.environ.get('LAB7_BENCH_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('LAB7_BENCH_PASSWORD', ''))
+    parser.add_argument('--database', default=os.environ.get('LAB7_BENCH_DATABASE', 'lab7_bench'))
+
+
+def connect(args):
+    # The seeding below drops and recreates the tables, so never point it at the real server
+    if args.host == PRODUCTION_HOST:
+        raise SystemExit("Refusing to run benchmarks against the production database.")
+
+    conn = mysql.connector.connect(host=args.host, port=args.port, user=args.user, password=args.password)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    cursor.execute(f"USE `{args.database}`")
+    cursor.close()
+    return conn
+
+
+def create_schema(conn):
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS lab7_reservations")
+    cursor.execute("DROP TABLE IF EXISTS lab7_rooms")
+    cursor.execute("DROP TABLE IF EXISTS schema_migrations")  # Fresh tables have none applied
+    cursor.execute(ROOMS_DDL)
+    cursor.execute(RESERVATIONS_DDL)
+    conn.commit()
+    cursor.close()
+
+
+def generate_rooms(num_rooms, rng):
+    rooms = []
+    for i in range(num_rooms):
+        beds = rng.randint(1, 2)
+        rooms.append((
+            f"R{i:04d}",
+            f"Room {i}",
+            beds,
+            rng.choice(BED_TYPES),
+            beds * 2,
+            rng.randrange(75, 300, 25),
+            rng.choice(DECORS),
+        ))
+    return rooms
+
+
+def generate_reservations(rooms, num_reservations, rng, today=None):
+    # Stays of 1-14 nights with check-ins spread two years either side of today
+    today = today or datetime.date.today()
+    for _ in range(num_reservations):
+        room = rng.choice(rooms)
+        checkin = today + datetime.timedelta(days=rng.randint(-730, 730))
+        nights = rng.randint(1, 14)
+        yield (
+            room[0],
+            checkin,
+            checkin + datetime.timedelta(days=nights),
+            round(float(room[5]) * nights * rng.uniform(0.9, 1.2), 2),
+            rng.choice(LAST_NAMES),
+            rng.choice(FIRST_NAMES),
+            rng.randint(1, room[4]),
+            0,
+        )
+
+
+def seed(conn, num_reservations, num_rooms=10, random_seed=365, batch_size=10000):
+    # Recreates both tables and fills them with deterministic synthetic data
+    rng = random.Random(random_seed)
+    create_schema(conn)
+    cursor = conn.cursor()
+
+    rooms = generate_rooms(num_rooms, rng)
+    cursor.executemany("""
+        INSERT INTO lab7_rooms (RoomCode, RoomName, Beds, bedType, maxOcc, basePrice, decor)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, rooms)
+
+    batch = []
+    for row in generate_reservations(rooms, num_reservations, rng):
+        batch.append(row)
+        if len(batch) == batch_size:
+            insert_reservations(cursor, batch)
+            batch = []
+    if batch:
+        insert_reservations(cursor, batch)
+
+    conn.commit()
+    cursor.close()
+
+
+def insert_reservations(cursor, rows):
+    cursor.executemany("""
+        INSERT INTO lab7_reservations (Room, CheckIn, Checkout, Rate, LastName, FirstName, Adults, Kids)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, rows)
@@ -0,0 +1,67 @@
+import collections
+import threading
+import time
+
+
+class TTLCache:
+    # Bounded LRU cache whose entries expire `ttl` seconds after they were stored.
+    # Hit/miss/eviction counters are kept so TTLs and sizes can be tuned.
+
+    def __init__(self, maxsize=128, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict()  # key -> (expires at, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, load):
+        # Returns the cached value, calling load() and storing its result on a miss
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = load()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+                'ttl': self.ttl,
+            }
@@ -0,0 +1,93 @@
+import contextlib
+import random
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errorcode, pooling
+
+# Connection management shared by the menu, batch jobs and worker threads.
+# Connections come from a mysql.connector pool, are health-checked on checkout,
+# and operations that hit a transient error are retried with exponential backoff.
+
+TRANSIENT_ERRORS = {
+    errorcode.CR_CONN_HOST_ERROR,
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+    errorcode.ER_LOCK_WAIT_TIMEOUT,
+    errorcode.ER_LOCK_DEADLOCK,
+}
+
+
+def is_transient(err):
+    # Pool exhaustion is transient too: another thread will hand its connection back
+    return isinstance(err, pooling.PoolError) or getattr(err, 'errno', None) in TRANSIENT_ERRORS
+
+
+class ConnectionPool:
+
+    def __init__(self, size=5, retries=3, backoff=0.2, lazy=False, **config):
+        # With lazy=True no connection is opened until the first checkout
+        self.config = config
+        self.size = size
+        self.retries = retries
+        self.backoff = backoff
+        self.lock = threading.Lock()
+        self._pool = None
+        if not lazy:
+            self._open()
+
+    def _open(self):
+        # Sessions are not reset on return so prepared statements (see queries.py) survive
+        # between checkouts; connection() rolls back anything left uncommitted instead
+        with self.lock:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(pool_name="lab7", pool_size=self.size,
+                                                         pool_reset_session=False, **self.config)
+        return self._pool
+
+    @property
+    def pool(self):
+        return self._pool or self._open()
+
+    def _sleep(self, attempt):
+        # Exponential backoff with jitter so retrying threads don't reconnect in lockstep
+        time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def get_connection(self):
+        # Checks a connection out of the pool, reconnecting it if the server dropped it.
+        # Closing the returned connection hands it back to the pool.
+        for attempt in range(self.retries + 1):
+            try:
+                conn = self.pool.get_connection()
+                conn.ping(reconnect=True, attempts=1, delay=0)
+                return conn
+            except mysql.connector.Error as err:
+                if not is_transient(err) or attempt == self.retries:
+                    raise
+                self._sleep(attempt)
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            finally:
+                conn.close()
+
+    def run(self, operation, *args, **kwargs):
+        # Runs operation(conn, *args, **kwargs) on a pooled connection, retrying transient
+        # failures on a fresh connection. Only for operations that are safe to repeat.
+        for attempt in range(self.retries + 1):
+            try:
+                with self.connection() as conn:
+                    return operation(conn, *args, **kwargs)
+            except mysql.connector.Error as err:
+                if not is_transient(err) or attempt == self.retries:
+                    raise
+                self._sleep(attempt)
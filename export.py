@@ -0,0 +1,134 @@
+import datetime
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: without pyarrow snapshots are gzipped CSV
+    pa = pc = pq = None
+
+import Lab7
+
+# Exports lab7_rooms and lab7_reservations to a local snapshot directory for offline
+# analysis and for running the reports without the database (see snapshot.py).
+# Reservations are read in CODE order a chunk at a time and each chunk becomes its own part
+# file, so memory stays flat however large the table is. An incremental export only reads
+# reservations with CODE above the last one exported and adds them as new parts; it does
+# not see cancellations or edits to rows already exported, which need a full export.
+#
+#   manifest.json               format, last exported CODE, part files, export time
+#   rooms.<ext>                 lab7_rooms, rewritten on every export
+#   reservations-<first>-<last>.<ext>
+#
+# Formats: 'arrow' (Arrow IPC files, memory-mapped when loaded), 'parquet' (compressed,
+# for other tools) and 'csv' (gzipped, used when pyarrow isn't installed).
+
+FORMATS = ('arrow', 'parquet', 'csv')
+EXTENSIONS = {'arrow': '.arrow', 'parquet': '.parquet', 'csv': '.csv.gz'}
+CHUNK_ROWS = 100000
+MANIFEST = 'manifest.json'
+
+
+def default_format():
+    return 'arrow' if pa is not None else 'csv'
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_atomic(path, write):
+    # write(temporary path), then move it into place so readers never see a partial file
+    temporary = path + '.tmp'
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def reservation_schema(schema):
+    # The schema every reservations part is written with, whatever values its chunk holds:
+    # inferred types vary by chunk (DECIMAL precision follows the largest Rate) and parts
+    # with different schemas can't be concatenated when the snapshot is loaded
+    types = {'CODE': pa.int64(), 'Room': pa.string(), 'CheckIn': pa.date32(), 'Checkout': pa.date32(),
+             'Rate': pa.decimal128(10, 2), 'LastName': pa.string(), 'FirstName': pa.string(),
+             'Adults': pa.int64(), 'Kids': pa.int64()}
+    return pa.schema([pa.field(field.name, types.get(field.name, field.type)) for field in schema])
+
+
+def write_frame(df, path, file_format, reservations=False):
+    if file_format == 'csv':
+        write_atomic(path, lambda target: df.to_csv(target, index=False, compression='gzip'))
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if reservations:
+        table = table.cast(reservation_schema(table.schema))
+    if file_format == 'parquet':
+        write_atomic(path, lambda target: pq.write_table(table, target))
+    else:
+        def write_ipc(target):
+            with pa.OSFile(target, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        write_atomic(path, write_ipc)
+
+
+def export_snapshot(conn, directory, file_format=None, incremental=True, chunk_rows=CHUNK_ROWS):
+    # Writes or extends the snapshot in `directory` and returns its manifest. With
+    # incremental=False (or no earlier snapshot) every reservation is exported again.
+    manifest = read_manifest(directory) if incremental else None
+    file_format = file_format or (manifest['format'] if manifest else default_format())
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    if file_format != 'csv' and pa is None:
+        raise ValueError(f"The {file_format} format needs pyarrow; use csv or install pyarrow")
+    os.makedirs(directory, exist_ok=True)
+
+    if manifest is not None and manifest['format'] != file_format:
+        raise ValueError(f"{directory} holds a {manifest['format']} snapshot; export it in full to change format")
+    fresh = manifest is None
+    if fresh:
+        manifest = {'format': file_format, 'last_code': None, 'reservations': []}
+    extension = EXTENSIONS[file_format]
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT * FROM lab7_rooms ORDER BY RoomCode")
+        rooms = pd.DataFrame(cursor.fetchall(), columns=[desc[0] for desc in cursor.description])
+    finally:
+        cursor.close()
+    write_frame(rooms, os.path.join(directory, 'rooms' + extension), file_format)
+    manifest['rooms'] = 'rooms' + extension
+    if fresh:
+        # Drop the parts of any earlier snapshot before starting over
+        for name in os.listdir(directory):
+            if name.startswith('reservations-'):
+                os.remove(os.path.join(directory, name))
+        save_manifest(directory, manifest)
+
+    for columns, rows in Lab7.stream_reservations(conn, chunk_rows, keyset=True, after_code=manifest['last_code']):
+        chunk = pd.DataFrame(rows, columns=columns)
+        first, last = int(chunk['CODE'].iloc[0]), int(chunk['CODE'].iloc[-1])
+        name = f"reservations-{first}-{last}{extension}"
+        write_frame(chunk, os.path.join(directory, name), file_format, reservations=True)
+        # Recorded after every part so an interrupted export resumes where it stopped
+        manifest['reservations'].append(name)
+        manifest['last_code'] = last
+        manifest['exported_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+        save_manifest(directory, manifest)
+
+    manifest['exported_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+    save_manifest(directory, manifest)
+    return manifest
+
+
+def save_manifest(directory, manifest):
+    def write(target):
+        with open(target, 'w') as f:
+            json.dump(manifest, f, indent=2)
+    write_atomic(os.path.join(directory, MANIFEST), write)
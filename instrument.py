@@ -0,0 +1,188 @@
+import json
+import logging
+import re
+import threading
+import time
+
+# Per-query instrumentation. InstrumentedConnection hands out cursors that record each
+# statement's shape, wall time (execute through the last fetch), rows returned and bytes
+# fetched. Every statement is written to the 'lab7.queries' logger as one JSON line, slow
+# ones at WARNING with an optional EXPLAIN, and totals per shape are kept for the session.
+
+log = logging.getLogger('lab7.queries')
+log.addHandler(logging.NullHandler())  # Silent unless the application attaches a handler
+
+SLOW_QUERY_SECONDS = 0.5
+EXPLAIN_SLOW_QUERIES = False
+
+
+def statement_shape(sql):
+    # Statement text with literals and parameters replaced by ?, so every run of the
+    # same query groups together whatever values it was given
+    shape = re.sub(r'--[^\n]*', ' ', sql)
+    shape = re.sub(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"", '?', shape)
+    shape = re.sub(r'%s|\b\d+(?:\.\d+)?\b', '?', shape)
+    shape = re.sub(r'\s+', ' ', shape).strip()
+    return re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(?, ...)', shape)
+
+
+def row_bytes(row):
+    return sum(len(value) if isinstance(value, (bytes, str)) else len(str(value))
+               for value in row if value is not None)
+
+
+class QueryStats:
+    # Running totals per statement shape for the current session
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.shapes = {}
+
+    def record(self, shape, seconds, rows, fetched, slow):
+        with self.lock:
+            entry = self.shapes.setdefault(shape, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                                   'rows': 0, 'bytes': 0, 'slow': 0})
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            entry['rows'] += rows
+            entry['bytes'] += fetched
+            entry['slow'] += slow
+
+    def summary(self):
+        # Shapes ordered by total time, slowest first
+        with self.lock:
+            return sorted(((shape, dict(entry)) for shape, entry in self.shapes.items()),
+                          key=lambda item: item[1]['seconds'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.shapes.clear()
+
+
+stats = QueryStats()
+
+
+class InstrumentedCursor:
+
+    def __init__(self, cursor, conn):
+        self.cursor = cursor
+        # The real connection rather than a pool checkout: prepared cursors are kept across
+        # checkouts, and a returned PooledMySQLConnection can no longer open cursors
+        self.conn = getattr(conn, '_cnx', None) or conn
+        self.current = None  # (sql, params, shape, start time) of the statement being fetched
+        self.rows = 0
+        self.fetched = 0
+
+    def _begin(self, sql, params):
+        self._finish()
+        self.current = (sql, params, statement_shape(sql), time.perf_counter())
+        self.rows = 0
+        self.fetched = 0
+
+    def _finish(self):
+        # Records the previous statement once its results are done with
+        if self.current is None:
+            return
+        sql, params, shape, start = self.current
+        self.current = None
+        seconds = time.perf_counter() - start
+        rows = self.rows if self.rows else max(self.cursor.rowcount or 0, 0)
+        slow = seconds >= SLOW_QUERY_SECONDS
+        stats.record(shape, seconds, rows, self.fetched, slow)
+
+        entry = {'shape': shape, 'seconds': round(seconds, 6), 'rows': rows, 'bytes': self.fetched}
+        if slow:
+            entry['slow'] = True
+            if EXPLAIN_SLOW_QUERIES and shape.upper().startswith(('SELECT', 'WITH')):
+                entry['explain'] = self._explain(sql, params)
+            log.warning(json.dumps(entry, default=str))
+        else:
+            log.info(json.dumps(entry, default=str))
+
+    def _explain(self, sql, params):
+        cursor = None
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("EXPLAIN " + sql, params)
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as err:
+            return f"EXPLAIN failed: {err}"
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def _count(self, rows):
+        self.rows += len(rows)
+        self.fetched += sum(row_bytes(row) for row in rows)
+        return rows
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        self._begin(sql, params)
+        result = self.cursor.execute(sql, params, *args, **kwargs)
+        if not self.cursor.with_rows:
+            self._finish()  # Nothing to fetch, e.g. INSERT or DELETE
+        return result
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        self._begin(sql, None)
+        result = self.cursor.executemany(sql, seq_params, *args, **kwargs)
+        self._finish()
+        return result
+
+    def fetchall(self):
+        rows = self._count(self.cursor.fetchall())
+        self._finish()
+        return rows
+
+    def fetchmany(self, size=1):
+        rows = self._count(self.cursor.fetchmany(size))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is None:
+            self._finish()
+        else:
+            self._count([row])
+        return row
+
+    def close(self):
+        self._finish()
+        return self.cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        # description, rowcount, lastrowid, ... come straight from the real cursor
+        return getattr(self.cursor, name)
+
+
+class InstrumentedConnection:
+    # Wraps a connection so every cursor handed out is instrumented
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.conn.cursor(*args, **kwargs), self.conn)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def print_summary():
+    summary = stats.summary()
+    if not summary:
+        print("No queries run yet.")
+        return
+    print("\n**Query Stats This Session (slowest total first)**")
+    for shape, entry in summary:
+        average = entry['seconds'] / entry['count']
+        print(f"{entry['count']:>5}x  total {entry['seconds']:.3f}s  avg {average:.4f}s  max {entry['max_seconds']:.4f}s"
+              f"  rows {entry['rows']}  bytes {entry['bytes']}  slow {entry['slow']}")
+        print(f"       {shape[:150]}")
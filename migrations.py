@@ -0,0 +1,92 @@
+import mysql.connector
+
+# Schema changes to lab7_reservations, applied in order by `python Lab7.py --migrate` and
+# recorded in schema_migrations so each runs once per database. Each migration is a single
+# ALTER TABLE, which MySQL applies atomically. Code that relies on a migration checks
+# is_applied() and falls back to the original queries when it hasn't been run.
+#
+#   guest_name_index  - (LastName, FirstName, CheckIn) and (FirstName, CheckIn) indexes, so
+#                       name lookups, prefix patterns like 'AL%' and the cancel lookup's
+#                       ORDER BY CheckIn are index range scans instead of full scans
+#   guest_name_suffix - reversed, upper-cased copies of both names, maintained by MySQL as
+#                       stored generated columns and indexed, so suffix patterns like '%SON'
+#                       become prefix scans ('NOS%') on the reversed column. INVISIBLE keeps
+#                       them out of SELECT * (MySQL 8.0.23+, MariaDB 10.3+).
+#
+# Infix patterns like '%AL%' still scan; a B-tree index can't serve them.
+
+MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        Name VARCHAR(64) PRIMARY KEY,
+        AppliedAt DATETIME NOT NULL
+    )
+"""
+
+MIGRATIONS = [
+    ('guest_name_index', """
+        ALTER TABLE lab7_reservations
+            ADD INDEX idx_guest_name (LastName, FirstName, CheckIn),
+            ADD INDEX idx_guest_first (FirstName, CheckIn)
+    """),
+    ('guest_name_suffix', """
+        ALTER TABLE lab7_reservations
+            ADD COLUMN LastNameRev VARCHAR(64) AS (REVERSE(UPPER(LastName))) STORED INVISIBLE,
+            ADD COLUMN FirstNameRev VARCHAR(64) AS (REVERSE(UPPER(FirstName))) STORED INVISIBLE,
+            ADD INDEX idx_guest_last_rev (LastNameRev),
+            ADD INDEX idx_guest_first_rev (FirstNameRev)
+    """),
+]
+
+_applied = None  # Names of applied migrations; looked up once per process
+
+
+def applied(conn):
+    global _applied
+    if _applied is None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SHOW TABLES LIKE 'schema_migrations'")
+            if cursor.fetchall():
+                cursor.execute("SELECT Name FROM schema_migrations")
+                _applied = {name for (name,) in cursor.fetchall()}
+            else:
+                _applied = set()
+        finally:
+            cursor.close()
+    return _applied
+
+
+def is_applied(conn, name):
+    return name in applied(conn)
+
+
+def reversed_names(conn):
+    # Whether lookups can match '%suffix' name patterns on the reversed name columns
+    return is_applied(conn, 'guest_name_suffix')
+
+
+def pending(conn):
+    done = applied(conn)
+    return [(name, ddl) for name, ddl in MIGRATIONS if name not in done]
+
+
+def migrate(conn):
+    # Applies every pending migration in order and returns their names. DDL commits
+    # implicitly, so a failure leaves the earlier migrations applied and recorded.
+    global _applied
+    cursor = conn.cursor()
+    ran = []
+    try:
+        cursor.execute(MIGRATIONS_DDL)
+        for name, ddl in pending(conn):
+            cursor.execute(ddl)
+            cursor.execute("INSERT INTO schema_migrations (Name, AppliedAt) VALUES (%s, NOW())", (name,))
+            conn.commit()
+            ran.append(name)
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        _applied = None  # Re-read on next use
+    return ran
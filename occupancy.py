@@ -0,0 +1,149 @@
+import bisect
+import datetime
+
+import numpy as np
+
+
+class OccupancyIndex:
+    # In-process index of reservations: per room, a list of (CheckIn, Checkout, CODE)
+    # kept sorted by CheckIn so overlap checks never need a database round trip
+
+    def __init__(self):
+        self.stays = {}  # room code -> sorted list of (checkin, checkout, code)
+        self.codes = {}  # reservation code -> room code
+        self.longest = {}  # room code -> longest stay seen, bounds how far back overlaps can start
+
+    @classmethod
+    def load(cls, conn):
+        # Builds the index from a single scan of the reservations table
+        index = cls()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT CODE, Room, CheckIn, Checkout FROM lab7_reservations")
+            for code, room, checkin, checkout in cursor.fetchall():
+                index.stays.setdefault(room, []).append((checkin, checkout, code))
+                index.codes[code] = room
+                index._note_length(room, checkin, checkout)
+        finally:
+            cursor.close()
+
+        for stays in index.stays.values():
+            stays.sort()
+        return index
+
+    def add(self, code, room, checkin, checkout):
+        bisect.insort(self.stays.setdefault(room, []), (checkin, checkout, code))
+        self.codes[code] = room
+        self._note_length(room, checkin, checkout)
+
+    def _note_length(self, room, checkin, checkout):
+        length = checkout - checkin
+        if length > self.longest.get(room, datetime.timedelta(0)):
+            self.longest[room] = length
+
+    def remove(self, code):
+        room = self.codes.pop(code, None)
+        if room is None:
+            return
+        self.stays[room] = [stay for stay in self.stays[room] if stay[2] != code]
+
+    def overlaps(self, room, start_date, end_date):
+        # Mirrors the SQL overlap check in find_available_rooms:
+        #   (CheckIn <= start AND Checkout > start) OR
+        #   (CheckIn < end AND Checkout >= end) OR
+        #   (CheckIn >= start AND Checkout <= end)
+        stays = self.stays.get(room, [])
+        if not stays:
+            return False
+
+        # Every clause needs Checkout > start or CheckIn >= start, and CheckIn <= end, so only
+        # stays starting in [start - longest stay, end] can match
+        lo = bisect.bisect_left(stays, (start_date - self.longest[room],))
+        hi = bisect.bisect_right(stays, (end_date, datetime.date.max))
+        for checkin, checkout, _ in stays[lo:hi]:
+            if checkin <= start_date and checkout > start_date:
+                return True
+            if checkin < end_date and checkout >= end_date:
+                return True
+            if checkin >= start_date and checkout <= end_date:
+                return True
+        return False
+
+    def is_free(self, room, start_date, end_date):
+        return not self.overlaps(room, start_date, end_date)
+
+    def available(self, rooms, start_date, end_date):
+        # Filters room rows (RoomCode first) the same way find_available_rooms does
+        return [room for room in rooms if self.is_free(room[0], start_date, end_date)]
+
+    def first_free_window(self, room, earliest, nights, latest=None):
+        # Earliest check-in on or after `earliest` with `nights` consecutive free nights,
+        # or None if no such window starts on or before `latest`
+        length = datetime.timedelta(days=nights)
+        candidate = earliest
+        for checkin, checkout, _ in self.stays.get(room, []):
+            if latest is not None and candidate > latest:
+                return None
+            if checkout <= candidate:
+                continue
+            if checkin >= candidate + length:
+                break
+            candidate = max(candidate, checkout)
+
+        if latest is not None and candidate > latest:
+            return None
+        return candidate
+
+
+def build_occupancy_matrix(room_codes, stays, window_start, days):
+    # rooms x days boolean matrix: True where the room is booked for the night starting on
+    # window_start + day. stays are (Room, CheckIn, Checkout); each stay marks +1 at its first
+    # night and -1 after its last, so one cumulative sum fills every row at once.
+    # Dates go through toordinal(): converting date objects to datetime64 costs far more.
+    positions = {code: i for i, code in enumerate(room_codes)}
+    stays = [stay for stay in stays if stay[0] in positions]
+    width = days + 1
+    cells = len(room_codes) * width
+    occupancy = np.zeros(cells, dtype=np.int64)
+    if stays:
+        count = len(stays)
+        origin = window_start.toordinal()
+        rows = np.fromiter((positions[room] for room, _, _ in stays), dtype=np.int64, count=count)
+        first = np.fromiter((checkin.toordinal() for _, checkin, _ in stays), dtype=np.int64, count=count)
+        last = np.fromiter((checkout.toordinal() for _, _, checkout in stays), dtype=np.int64, count=count)
+        first = np.clip(first - origin, 0, days)
+        last = np.clip(last - origin, 0, days)
+        occupancy += np.bincount(rows * width + first, minlength=cells)
+        occupancy -= np.bincount(rows * width + last, minlength=cells)
+    return np.cumsum(occupancy.reshape(len(room_codes), width), axis=1)[:, :days] > 0
+
+
+def fetch_window_stays(cursor, window_start, window_end, room_codes=None, index=None):
+    # (Room, CheckIn, Checkout) of every stay with a night in [window_start, window_end),
+    # from one query, or from the OccupancyIndex without touching the database
+    if index is not None:
+        codes = index.stays.keys() if room_codes is None else room_codes
+        return [(room, checkin, checkout) for room in codes for checkin, checkout, _ in index.stays.get(room, [])
+                if checkin < window_end and checkout > window_start]
+
+    query = "SELECT Room, CheckIn, Checkout FROM lab7_reservations WHERE CheckIn < %s AND Checkout > %s"
+    params = [window_end, window_start]
+    if room_codes is not None:
+        if not room_codes:
+            return []
+        query += f" AND Room IN ({', '.join(['%s'] * len(room_codes))})"
+        params.extend(room_codes)
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def occupancy_calendar(cursor, room_codes, window_start, days, index=None, all_rooms=False):
+    # (booked, per-room rate, per-day rate) for `days` nights from window_start: the rooms x days
+    # matrix from one fetch of the overlapping stays, and the share of nights booked along each
+    # axis. Pass all_rooms when room_codes is every room to drop the Room IN (...) filter.
+    window_end = window_start + datetime.timedelta(days=days)
+    stays = fetch_window_stays(cursor, window_start, window_end, None if all_rooms else room_codes, index)
+    booked = build_occupancy_matrix(room_codes, stays, window_start, days)
+    room_rates = booked.mean(axis=1) if days else np.zeros(len(room_codes))
+    day_rates = booked.mean(axis=0) if len(room_codes) else np.zeros(days)
+    return booked, room_rates, day_rates
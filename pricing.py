@@ -0,0 +1,45 @@
+import numpy as np
+
+# Stay pricing rules shared by booking, the availability listing, batch mode and the
+# revenue reports. A night is a weekend night when it starts on a Saturday or Sunday
+# (Python weekday() >= 5, MySQL WEEKDAY() IN (5,6)) and is charged WEEKEND_FACTOR times
+# the nightly amount. Amounts are rounded to cents half up, as MySQL rounds the DECIMAL
+# Rate column, by round_half_up everywhere.
+
+WEEKEND_FACTOR = 1.1
+WEEKDAY_MASK = '1111100'  # Mon-Fri for np.busday_count / np.is_busday
+
+
+def night_counts(start_dates, end_dates):
+    # (weekday nights, weekend nights) in [start, end), in O(1) per stay.
+    # Takes single dates or arrays of them.
+    nights = (np.asarray(end_dates, dtype='datetime64[D]') - np.asarray(start_dates, dtype='datetime64[D]')).astype(int)
+    weekdays = np.busday_count(start_dates, end_dates, weekmask=WEEKDAY_MASK)
+    return weekdays, nights - weekdays
+
+
+def stay_costs(base_rates, start_date, end_date):
+    # Total cost for each base rate, e.g. every room in a search result. The dates can be
+    # one stay shared by all rates or arrays giving each rate its own stay.
+    weekdays, weekends = night_counts(start_date, end_date)
+    rates = np.asarray(base_rates, dtype=float)
+    return round_half_up(weekdays * rates + weekends * rates * WEEKEND_FACTOR, 2)
+
+
+def price_stay(base_rate, start_date, end_date):
+    # Weekday nights at the base rate, weekend nights at 110%
+    return float(stay_costs([base_rate], start_date, end_date)[0])
+
+
+def round_half_up(values, decimals):
+    # MySQL ROUND() on DECIMAL rounds halves away from zero; np.round rounds them to even.
+    # The small nudge absorbs float error from rates that were exact decimals in MySQL.
+    scale = 10 ** decimals
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5 + 1e-9) / scale
+
+
+def nightly_revenue(rates, stay_nights, weekend):
+    # Revenue the reports credit to one night: the stay's rate spread evenly over its nights,
+    # with the weekend factor applied, rounded to cents. Vectorized over nights.
+    factor = np.where(weekend, WEEKEND_FACTOR, 1.0)
+    return round_half_up(np.asarray(rates, dtype=float) * factor / stay_nights, 2)
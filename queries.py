@@ -0,0 +1,148 @@
+import functools
+
+import mysql.connector
+from mysql.connector import errorcode
+
+# Parameterized statements for reservation lookups and cancellations.
+# Optional filters map onto a small fixed set of statement shapes, so the server sees the
+# same statement text for every input with the same shape and each shape is prepared once
+# per session. Values are always bound as parameters, never formatted into the SQL.
+
+WILDCARDS = '%_[]^-{}'
+
+CANCEL_LOOKUP = ('cancel_lookup', """
+    SELECT *
+    FROM lab7_reservations AS r
+    WHERE r.FirstName = %s AND r.LastName = %s
+    ORDER BY r.CheckIn""")
+
+CANCEL_VERIFY = ('cancel_verify', """
+    SELECT r.CODE
+    FROM lab7_reservations AS r
+    WHERE r.CODE = %s AND r.FirstName = %s AND r.LastName = %s""")
+
+CANCEL_DELETE = ('cancel_delete', "DELETE FROM lab7_reservations WHERE CODE = %s")
+
+
+def match_kind(value, reversed_names=False):
+    # None for a blank filter, 'like' when the value has wildcard characters, else 'eq'.
+    # With reversed_names, a name pattern that is '%' then plain text is 'suffix' and is
+    # matched as a prefix of the reversed name column (see migrations.py).
+    if value == '':
+        return None
+    if reversed_names and value[0] == '%' and value[1:] and not any(char in value[1:] for char in WILDCARDS):
+        return 'suffix'
+    if any(char in value for char in WILDCARDS):
+        return 'like'
+    return 'eq'
+
+
+def suffix_pattern(value):
+    # '%son' -> 'NOS%', for LIKE against the reversed, upper-cased name column
+    return value[1:][::-1].upper() + '%'
+
+
+def date_kind(startdate, enddate):
+    if startdate != '' and enddate != '':
+        return 'both'
+    if startdate != '':
+        return 'start'
+    if enddate != '':
+        return 'end'
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def reservation_info_sql(shape):
+    # Statement text for a (first, last, dates, room, code) filter shape
+    first, last, dates, room, code = shape
+    clauses = []
+    for column, kind in (('r.FirstName', first), ('r.LastName', last), ('r.Room', room)):
+        if kind == 'eq':
+            clauses.append(f"AND {column} = %s")
+        elif kind == 'like':
+            clauses.append(f"AND {column} LIKE %s")
+        elif kind == 'suffix':
+            clauses.append(f"AND {column}Rev LIKE %s")
+    if dates == 'both':
+        clauses.append("AND ((r.CheckIn <= %s AND r.Checkout >= %s) OR (r.CheckIn <= %s AND r.Checkout >= %s))")
+    elif dates is not None:
+        clauses.append("AND (r.CheckIn <= %s AND r.Checkout >= %s)")
+    if code is not None:
+        clauses.append("AND r.CODE = %s")
+
+    return f"""SELECT *
+        FROM lab7_reservations AS r
+        WHERE 1 = 1 {' '.join(clauses)}"""
+
+
+def reservation_info_statement(firstname='', lastname='', startdate='', enddate='', roomcode='', reservationcode='',
+                               reversed_names=False):
+    # Returns (shape, sql, params) for the reservation lookup. Blank filters match anything and
+    # names or room codes containing wildcard characters are matched with LIKE. Pass
+    # reversed_names once the guest_name_suffix migration is applied.
+    for char in "%_[]^{}":
+        if char in startdate or char in enddate:
+            raise ValueError("Invalid characters used")
+    for char in WILDCARDS:
+        if char in reservationcode:
+            raise ValueError("Invalid characters used")
+
+    shape = (match_kind(firstname, reversed_names), match_kind(lastname, reversed_names),
+             date_kind(startdate, enddate), match_kind(roomcode), 'eq' if reservationcode != '' else None)
+
+    # Parameters in the same order as the clauses in reservation_info_sql
+    params = [suffix_pattern(value) if kind == 'suffix' else value
+              for value, kind in ((firstname, shape[0]), (lastname, shape[1])) if value != '']
+    if roomcode != '':
+        params.append(roomcode)
+    if shape[2] == 'both':
+        params.extend([startdate, startdate, enddate, enddate])
+    elif shape[2] == 'start':
+        params.extend([startdate, startdate])
+    elif shape[2] == 'end':
+        params.extend([enddate, enddate])
+    if reservationcode != '':
+        params.append(reservationcode)
+
+    return ('reservation_info',) + shape, reservation_info_sql(shape), params
+
+
+class PreparedStatements:
+    # Prepared cursors for one server session, one per statement shape. Executing the same
+    # text on a prepared cursor reuses the server-side statement instead of parsing it again.
+
+    def __init__(self):
+        self.cursors = {}
+
+    def execute(self, conn, shape, sql, params):
+        # Returns the cursor; callers must fetch all of its rows before the shape is reused
+        cursor = self.cursors.get(shape)
+        if cursor is None:
+            cursor = self.cursors[shape] = conn.cursor(prepared=True)
+        try:
+            cursor.execute(sql, params)
+        except mysql.connector.Error as err:
+            if err.errno != errorcode.ER_UNKNOWN_STMT_HANDLER:
+                raise
+            # The server dropped the statement, e.g. after a reconnect; prepare it again
+            cursor = self.cursors[shape] = conn.cursor(prepared=True)
+            cursor.execute(sql, params)
+        return cursor
+
+
+_sessions = {}  # server connection id -> PreparedStatements
+
+
+def execute(conn, shape, sql, params):
+    # Runs a statement on the session's prepared cursor for its shape
+    statements = _sessions.setdefault(conn.connection_id, PreparedStatements())
+    return statements.execute(conn, shape, sql, params)
+
+
+def fetch(conn, statement, params):
+    # (columns, rows) for a (shape, sql) statement
+    shape, sql = statement
+    cursor = execute(conn, shape, sql, params)
+    rows = cursor.fetchall()
+    return [desc[0] for desc in cursor.description], rows
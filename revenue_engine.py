@@ -0,0 +1,168 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from pricing import WEEKDAY_MASK, nightly_revenue, round_half_up
+
+# Revenue report engines. All produce the RoomName/Jan..Dec/Total frame for the current year:
+#   sql     - recursive date CTE evaluated by MySQL (the original report)
+#   numpy   - fetches only this year's reservations and expands nights with NumPy date arithmetic
+#   summary - reads the incrementally maintained room_month_revenue table (revenue_summary.py)
+
+BACKENDS = ("sql", "numpy", "summary")
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+SQL_REVENUE_QUERY = """
+
+    WITH RECURSIVE datetable AS (
+        -- Generate daily dates for the current year dynamically
+        SELECT DATE_FORMAT(CURDATE(), '%Y-01-01') AS date_value
+        UNION ALL
+        SELECT DATE_ADD(date_value, INTERVAL 1 DAY)
+        FROM datetable
+        WHERE date_value < DATE_FORMAT(CURDATE(), '%Y-12-31')
+    )
+    SELECT 
+        revenue_data.RoomName,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 1  THEN daily_revenue ELSE 0 END), 0) AS Jan,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 2  THEN daily_revenue ELSE 0 END), 0) AS Feb,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 3  THEN daily_revenue ELSE 0 END), 0) AS Mar,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 4  THEN daily_revenue ELSE 0 END), 0) AS Apr,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 5  THEN daily_revenue ELSE 0 END), 0) AS May,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 6  THEN daily_revenue ELSE 0 END), 0) AS Jun,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 7  THEN daily_revenue ELSE 0 END), 0) AS Jul,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 8  THEN daily_revenue ELSE 0 END), 0) AS Aug,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 9  THEN daily_revenue ELSE 0 END), 0) AS Sep,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 10 THEN daily_revenue ELSE 0 END), 0) AS Oct,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 11 THEN daily_revenue ELSE 0 END), 0) AS Nov,
+        ROUND(SUM(CASE WHEN MONTH(revenue_data.stay_date) = 12 THEN daily_revenue ELSE 0 END), 0) AS `Dec`,
+        ROUND(SUM(daily_revenue), 0) AS Total
+    FROM (
+        -- Calculate per-day revenue for each reservation, adjusting for weekends
+        SELECT 
+            dt.date_value AS stay_date,
+            rooms.RoomName,
+            ROUND(
+                CASE 
+                    WHEN WEEKDAY(dt.date_value) IN (5,6) -- Saturday or Sunday
+                    THEN res.Rate * 1.1  -- Weekend rate = 110% of base rate
+                    ELSE res.Rate
+                END / DATEDIFF(res.CheckOut, res.CheckIn), 2
+            ) AS daily_revenue
+        FROM datetable dt
+        JOIN lab7_reservations res 
+            ON dt.date_value >= res.CheckIn AND dt.date_value < res.CheckOut
+        JOIN lab7_rooms rooms 
+            ON res.Room = rooms.RoomCode
+    ) revenue_data
+    GROUP BY revenue_data.RoomName
+    ORDER BY Total DESC;
+"""
+
+YEAR_RESERVATIONS_QUERY = """
+    SELECT rooms.RoomName, res.CheckIn, res.Checkout, res.Rate
+    FROM lab7_reservations res
+    JOIN lab7_rooms rooms
+        ON res.Room = rooms.RoomCode
+    WHERE res.CheckIn < %s AND res.Checkout > %s
+"""
+
+
+def revenue_frame(conn, backend="sql", year=None):
+    if backend == "sql":
+        return sql_revenue_frame(conn)
+    if backend == "numpy":
+        return numpy_revenue_frame(conn, year)
+    if backend == "summary":
+        import revenue_summary
+        return revenue_summary.summary_revenue_frame(conn, year)
+    raise ValueError(f"Unknown revenue backend: {backend}")
+
+
+def sql_revenue_frame(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_REVENUE_QUERY)
+        rows = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
+    finally:
+        cursor.close()
+    return pd.DataFrame(rows, columns=columns)
+
+
+def numpy_revenue_frame(conn, year=None):
+    # Same report as the CTE, but MySQL only returns the reservations overlapping the year
+    year = year or datetime.date.today().year
+    cursor = conn.cursor()
+    try:
+        cursor.execute(YEAR_RESERVATIONS_QUERY, (datetime.date(year + 1, 1, 1), datetime.date(year, 1, 1)))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    return revenue_from_rows(rows, year)
+
+
+def revenue_from_rows(rows, year):
+    # rows: (RoomName, CheckIn, Checkout, Rate) for stays overlapping `year`
+    room_names, totals = month_totals(rows, datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1))
+    return totals_frame(room_names, totals)
+
+
+def month_totals(rows, start, end):
+    # Unrounded revenue per room and month for the nights in [start, end), which must lie
+    # within one calendar year. rows: (RoomName, CheckIn, Checkout, Rate) for stays overlapping
+    # the range. Returns (room names, rooms x 12 array) for rooms with at least one night in it.
+    if not rows:
+        return np.array([], dtype=object), np.zeros((0, 12))
+
+    names, checkins, checkouts, rates = zip(*rows)
+    checkins = np.array(checkins, dtype='datetime64[D]')
+    checkouts = np.array(checkouts, dtype='datetime64[D]')
+    rates = np.array(rates, dtype=float)
+    room_names, room_ids = np.unique(np.array(names, dtype=object), return_inverse=True)
+
+    # Clip each stay to the range; the rate is still spread over the whole stay
+    range_start = np.datetime64(start, 'D')
+    range_end = np.datetime64(end, 'D')
+    stay_nights = (checkouts - checkins).astype(int)
+    first = np.maximum(checkins, range_start)
+    counts = np.clip((np.minimum(checkouts, range_end) - first).astype(int), 0, None)
+
+    # One entry per night in the range: repeat each stay, then add 0..count-1 days
+    stay = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    nights = first[stay] + offsets
+
+    weekend = ~np.is_busday(nights, weekmask=WEEKDAY_MASK)
+    daily = nightly_revenue(rates[stay], stay_nights[stay], weekend)
+    months = nights.astype('datetime64[M]').astype(int) % 12
+
+    # Pivot by room and month in one bincount over room * 12 + month
+    totals = np.bincount(room_ids[stay] * 12 + months, weights=daily,
+                         minlength=len(room_names) * 12).reshape(len(room_names), 12)
+    booked = np.bincount(room_ids[stay], minlength=len(room_names)) > 0
+    return room_names[booked], totals[booked]
+
+
+def totals_frame(room_names, totals):
+    # The RoomName/Jan..Dec/Total report from unrounded month totals, rounded like the CTE
+    columns = ['RoomName'] + MONTHS + ['Total']
+    if len(room_names) == 0:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.DataFrame(round_half_up(totals, 0), columns=MONTHS)
+    df.insert(0, 'RoomName', room_names)
+    df['Total'] = round_half_up(totals.sum(axis=1), 0)
+    df[MONTHS + ['Total']] = df[MONTHS + ['Total']].astype(int)
+    return df.sort_values('Total', ascending=False, kind='stable').reset_index(drop=True)[columns]
+
+
+def compare_backends(conn):
+    # Largest absolute difference between the two engines across every room and column
+    sql_df = sql_revenue_frame(conn).set_index('RoomName')
+    numpy_df = numpy_revenue_frame(conn).set_index('RoomName')
+    sql_df, numpy_df = sql_df.astype(float).align(numpy_df.astype(float), fill_value=0)
+    if sql_df.empty:
+        return 0
+    return float((sql_df - numpy_df).abs().to_numpy().max())
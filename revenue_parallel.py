@@ -0,0 +1,160 @@
+import concurrent.futures
+import datetime
+import hashlib
+import json
+import os
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+
+import revenue_engine
+
+# Revenue for several years or any date range. The work is split into partitions of one
+# calendar year by one range of room codes; each partition runs in a worker process that
+# opens its own connection, fetches only its slice of reservations and returns unrounded
+# month totals. Partitions never share a (room, month) cell, so merging is concatenation,
+# and each year is rounded into the usual RoomName/Jan..Dec/Total layout with a Year column.
+#
+# Partitions that end before the current year are written to CACHE_DIR and read back from
+# there afterwards: past years are treated as closed. Pass refresh=True (--refresh-revenue-cache)
+# after changing reservations in a past year.
+
+ROOMS_PER_PARTITION = 50
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.revenue_cache')
+
+PARTITION_QUERY = """
+    SELECT rooms.RoomName, res.CheckIn, res.Checkout, res.Rate
+    FROM lab7_reservations res
+    JOIN lab7_rooms rooms
+        ON res.Room = rooms.RoomCode
+    WHERE res.Room BETWEEN %s AND %s AND res.CheckIn < %s AND res.Checkout > %s
+"""
+
+
+def parse_period(text, today=None):
+    # [start, end) for '2024', '2022-2025' or '2024-03-01:2024-06-30' (end date included);
+    # blank means the current year. Raises ValueError for anything else.
+    today = today or datetime.date.today()
+    text = text.strip()
+    if text == '':
+        return datetime.date(today.year, 1, 1), datetime.date(today.year + 1, 1, 1)
+    if ':' in text:
+        first, last = (datetime.date.fromisoformat(part.strip()) for part in text.split(':', 1))
+        start, end = first, last + datetime.timedelta(days=1)
+    else:
+        first, _, last = text.partition('-')
+        start, end = datetime.date(int(first), 1, 1), datetime.date(int(last or first) + 1, 1, 1)
+    if start >= end:
+        raise ValueError("The period must end after it starts")
+    return start, end
+
+
+def room_ranges(conn, rooms_per_partition=ROOMS_PER_PARTITION):
+    # (first, last) RoomCode of each block of rooms, in code order
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT RoomCode FROM lab7_rooms ORDER BY RoomCode")
+        codes = [code for (code,) in cursor.fetchall()]
+    finally:
+        cursor.close()
+    return [(codes[i], codes[min(i + rooms_per_partition, len(codes)) - 1])
+            for i in range(0, len(codes), rooms_per_partition)]
+
+
+def years(start, end):
+    # (year, start, end) for each calendar year in [start, end), clipped to the range
+    for year in range(start.year, (end - datetime.timedelta(days=1)).year + 1):
+        yield year, max(start, datetime.date(year, 1, 1)), min(end, datetime.date(year + 1, 1, 1))
+
+
+def partitions(start, end, ranges):
+    # (year, first room, last room, start, end) for each year and block of rooms
+    for year, year_start, year_end in years(start, end):
+        for first_room, last_room in ranges:
+            yield year, first_room, last_room, year_start, year_end
+
+
+def year_frame(year, room_names, totals):
+    # One year of the report: RoomName/Year/Jan..Dec/Total
+    df = revenue_engine.totals_frame(np.array(room_names, dtype=object), np.array(totals, dtype=float).reshape(-1, 12))
+    df.insert(1, 'Year', year)
+    return df
+
+
+def partition_totals(config, first_room, last_room, start, end):
+    # Runs in a worker process: (room names, rooms x 12 month totals) as plain lists
+    conn = mysql.connector.connect(**config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(PARTITION_QUERY, (first_room, last_room, end, start))
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    room_names, totals = revenue_engine.month_totals(rows, start, end)
+    return list(room_names), totals.tolist()
+
+
+def cache_path(config, partition):
+    # One file per database and partition
+    key = json.dumps([config.get('host'), config.get('port'), config.get('database')] +
+                     [str(part) for part in partition])
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+
+def read_cached(path):
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+        return entry['rooms'], entry['totals']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_cached(path, result):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump({'rooms': result[0], 'totals': result[1]}, f)
+    os.replace(temporary, path)  # Readers never see a half-written file
+
+
+def revenue_by_year(conn, config, start, end, workers=None, refresh=False, today=None):
+    # Revenue for [start, end): RoomName/Year/Jan..Dec/Total, one row per room and year,
+    # years in order and rooms by Total within each. config: connection settings for the
+    # workers, e.g. db.ConnectionPool.config.
+    current_year_start = datetime.date((today or datetime.date.today()).year, 1, 1)
+    jobs = list(partitions(start, end, room_ranges(conn)))
+
+    results = {}
+    missing = []
+    for job in jobs:
+        cached = None if refresh or job[4] > current_year_start else read_cached(cache_path(config, job))
+        if cached is None:
+            missing.append(job)
+        else:
+            results[job] = cached
+
+    if len(missing) == 1 or workers == 1:
+        for job in missing:
+            results[job] = partition_totals(config, *job[1:])
+    elif missing:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(partition_totals, config, *job[1:]): job for job in missing}
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+
+    for job in missing:
+        if job[4] <= current_year_start:
+            write_cached(cache_path(config, job), results[job])
+
+    frames = []
+    for year, _, _ in years(start, end):
+        rooms, totals = [], []
+        for job in jobs:
+            if job[0] == year:
+                rooms.extend(results[job][0])
+                totals.extend(results[job][1])
+        frames.append(year_frame(year, rooms, totals))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,151 @@
+import collections
+import datetime
+import decimal
+
+import pandas as pd
+
+import pricing
+import revenue_engine
+
+# room_month_revenue holds each room's revenue and booked nights per calendar month.
+# Bookings and cancellations add or subtract their stay's share in the same transaction,
+# so the revenue report becomes a read of at most rooms x 12 rows.
+# Revenue per night follows the CTE report: the rate spread over the stay's nights,
+# times the weekend factor on Saturday and Sunday nights, rounded to cents.
+
+SUMMARY_DDL = """
+    CREATE TABLE IF NOT EXISTS room_month_revenue (
+        Room CHAR(5) NOT NULL,
+        Year SMALLINT NOT NULL,
+        Month TINYINT NOT NULL,
+        Revenue DECIMAL(12,2) NOT NULL,
+        Nights INT NOT NULL,
+        PRIMARY KEY (Room, Year, Month)
+    )
+"""
+
+UPSERT_DELTA = """
+    INSERT INTO room_month_revenue (Room, Year, Month, Revenue, Nights)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE Revenue = Revenue + VALUES(Revenue), Nights = Nights + VALUES(Nights)
+"""
+
+SUMMARY_YEAR_QUERY = """
+    SELECT rooms.RoomName, s.Month, SUM(s.Revenue), SUM(s.Nights)
+    FROM room_month_revenue s
+    JOIN lab7_rooms rooms
+        ON s.Room = rooms.RoomCode
+    WHERE s.Year = %s
+    GROUP BY rooms.RoomName, s.Month
+"""
+
+WEEKEND_FACTOR = decimal.Decimal(str(pricing.WEEKEND_FACTOR))
+CENT = decimal.Decimal('0.01')
+
+def is_enabled(cursor):
+    # Bookings only maintain the summary once it has been built with rebuild(). Checked in
+    # every writing transaction, not cached, so processes started before the rebuild (the
+    # service, other terminals) start maintaining it as soon as it exists.
+    cursor.execute("SHOW TABLES LIKE 'room_month_revenue'")
+    return bool(cursor.fetchall())
+
+
+def stay_deltas(stays, sign=1, deltas=None):
+    # Accumulates {(room, year, month): [revenue, nights]} for (room, checkin, checkout, rate)
+    # stays; sign=-1 gives the amounts to subtract for cancelled stays
+    deltas = collections.defaultdict(lambda: [decimal.Decimal(0), 0]) if deltas is None else deltas
+    for room, checkin, checkout, rate in stays:
+        nights = (checkout - checkin).days
+        if nights <= 0:
+            continue
+        rate = decimal.Decimal(str(rate))
+        weekday_night = (rate / nights).quantize(CENT, decimal.ROUND_HALF_UP)
+        weekend_night = (rate * WEEKEND_FACTOR / nights).quantize(CENT, decimal.ROUND_HALF_UP)
+        # One step per calendar month the stay touches, counting its nights in O(1)
+        month_start = checkin
+        while month_start < checkout:
+            next_month = datetime.date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+            month_end = min(next_month, checkout)
+            weekdays, weekends = pricing.night_counts(month_start, month_end)
+            entry = deltas[(room, month_start.year, month_start.month)]
+            entry[0] += sign * (int(weekdays) * weekday_night + int(weekends) * weekend_night)
+            entry[1] += sign * (month_end - month_start).days
+            month_start = month_end
+    return deltas
+
+
+def apply_deltas(cursor, deltas):
+    if deltas:
+        cursor.executemany(UPSERT_DELTA, [(room, year, month, revenue, nights)
+                                          for (room, year, month), (revenue, nights) in deltas.items()])
+
+
+def apply_stays(cursor, stays, sign=1):
+    # Adds (sign=1) or subtracts (sign=-1) the stays from the summary if it is in use.
+    # Runs on the caller's cursor so it commits or rolls back with the booking itself.
+    if is_enabled(cursor):
+        apply_deltas(cursor, stay_deltas(stays, sign))
+
+
+def rebuild(conn, batch_size=10000):
+    # Recomputes the whole summary from lab7_reservations
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SUMMARY_DDL)
+        cursor.execute("DELETE FROM room_month_revenue")
+        cursor.execute("SELECT Room, CheckIn, Checkout, Rate FROM lab7_reservations")
+        deltas = None
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            deltas = stay_deltas(rows, deltas=deltas)
+        writer = conn.cursor()
+        apply_deltas(writer, deltas)
+        writer.close()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def summary_revenue_frame(conn, year=None):
+    # The RoomName/Jan..Dec/Total report read from the summary table
+    year = year or datetime.date.today().year
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SUMMARY_YEAR_QUERY, (year,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    months = revenue_engine.MONTHS
+    columns = ['RoomName'] + months + ['Total']
+    totals = {}
+    for room_name, month, revenue, nights in rows:
+        entry = totals.setdefault(room_name, [[0.0] * 12, 0])
+        entry[0][month - 1] = float(revenue)
+        entry[1] += int(nights)
+
+    # Like the CTE, only rooms with at least one night in the year appear
+    booked = [(name, values) for name, (values, nights) in totals.items() if nights > 0]
+    if not booked:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.DataFrame([values for _, values in booked], columns=months)
+    df['Total'] = df[months].sum(axis=1)
+    df[months + ['Total']] = pricing.round_half_up(df[months + ['Total']].to_numpy(), 0).astype(int)
+    df.insert(0, 'RoomName', [name for name, _ in booked])
+    return df.sort_values('Total', ascending=False, kind='stable').reset_index(drop=True)[columns]
+
+
+def verify(conn):
+    # Compares the summary-backed report with the CTE report for the current year.
+    # Returns the rooms whose figures differ (empty when the summary is consistent).
+    expected = revenue_engine.sql_revenue_frame(conn).set_index('RoomName').astype(float)
+    actual = summary_revenue_frame(conn).set_index('RoomName').astype(float)
+    expected, actual = expected.align(actual, fill_value=0)
+    differences = (expected - actual).abs().max(axis=1) if not expected.empty else pd.Series(dtype=float)
+    return sorted(differences[differences > 0].index)
@@ -0,0 +1,362 @@
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import decimal
+import getpass
+import json
+import os
+import traceback
+import urllib.parse
+
+import mysql.connector
+
+import db
+import Lab7
+import migrations
+import pricing
+import queries
+import revenue_engine
+
+# Reservation operations as coroutines for many concurrent clients, served as JSON over
+# local HTTP. mysql.connector is blocking, so each operation runs on a worker thread with
+# its own pooled connection; a semaphore caps the operations in flight at the pool size
+# and requests beyond max_pending waiting ones are turned away with 503.
+#
+#   GET    /rooms                                   rooms and rates report
+#   GET    /availability?checkin=&checkout=&guests=[&room=&bed=]
+#   POST   /reservations                            {"room", "checkin", "checkout", "firstname",
+#                                                    "lastname", "adults", "kids"}
+#   DELETE /reservations/<code>
+#   GET    /reservations?firstname=&lastname=&start=&end=&room=&code=   (at least one filter)
+#   GET    /revenue[?backend=sql|numpy|summary&year=]    the sql report is current-year only;
+#                                                    a year defaults the backend to numpy
+#   GET    /occupancy?start=&end=[&rooms=R1,R2]    per room a '0'/'1' string, one character a night,
+#                                                    for at most MAX_OCCUPANCY_NIGHTS nights
+#
+# Run with: python service.py --port 8765 --workers 8 (credentials from LAB7_DB_USER/LAB7_DB_PASSWORD)
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_OCCUPANCY_NIGHTS = 731  # Two years of nights per /occupancy request
+
+
+class ServiceError(Exception):
+    # Turned into a JSON error response with this HTTP status
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Overloaded(ServiceError):
+
+    def __init__(self):
+        super().__init__(503, "Too many requests in flight, try again shortly")
+
+
+def parse_date(value, name):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ServiceError(400, f"{name} must be a YYYY-MM-DD date")
+
+
+def parse_int(value, name, default=None):
+    if value in (None, '') and default is not None:
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ServiceError(400, f"{name} must be a whole number")
+
+
+def records(df):
+    # DataFrame rows as JSON-ready dicts
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def to_json(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if hasattr(value, 'item'):  # NumPy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ReservationService:
+
+    def __init__(self, pool, workers=5, max_pending=64):
+        self.pool = pool
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lab7-service")
+        self.slots = asyncio.Semaphore(workers)  # One operation per worker thread and pooled connection
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def _run(self, operation, *args, retry=True):
+        # Runs operation(conn, *args) on a worker thread. Reads are retried on transient
+        # errors (see db.ConnectionPool.run); writes run once.
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        self.pending += 1
+        try:
+            async with self.slots:
+                loop = asyncio.get_running_loop()
+                if retry:
+                    return await loop.run_in_executor(self.executor, self.pool.run, operation, *args)
+                return await loop.run_in_executor(self.executor, self._run_once, operation, *args)
+        finally:
+            self.pending -= 1
+
+    def _run_once(self, operation, *args):
+        with self.pool.connection() as conn:
+            return operation(conn, *args)
+
+    async def rooms_and_rates(self):
+        columns, rows = await self._run(Lab7.rooms_and_rates_rows)
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def availability(self, checkin, checkout, guests, room="ANY", bed="Any"):
+        if checkout <= checkin:
+            raise ServiceError(400, "checkout must be after checkin")
+
+        def search(conn):
+            cursor = conn.cursor()
+            try:
+                return Lab7.find_available_rooms(cursor, guests, room, bed, checkin, checkout)
+            finally:
+                cursor.close()
+
+        rooms = await self._run(search)
+        costs = pricing.stay_costs([row[5] for row in rooms], checkin, checkout)
+        return [{'room': row[0], 'name': row[1], 'beds': row[2], 'bedType': row[3], 'maxOcc': row[4],
+                 'basePrice': row[5], 'decor': row[6], 'total': float(cost)}
+                for row, cost in zip(rooms, costs)]
+
+    async def book(self, room, checkin, checkout, firstname, lastname, adults, kids):
+        if checkout <= checkin:
+            raise ServiceError(400, "checkout must be after checkin")
+        if adults < 1 or kids < 0:
+            raise ServiceError(400, "adults must be at least 1 and kids at least 0")
+        if room == "ANY":
+            raise ServiceError(400, "room must be a room code; find a free one with /availability")
+
+        def reserve(conn):
+            cursor = conn.cursor()
+            try:
+                rooms = Lab7.candidate_rooms(cursor, adults + kids, room, "Any")
+            finally:
+                cursor.close()
+            if not rooms:
+                raise ServiceError(400, f"Room {room} does not exist or cannot hold {adults + kids} guests")
+            total = pricing.price_stay(rooms[0][5], checkin, checkout)
+            code = Lab7.book_room(conn, room, checkin, checkout, total, lastname, firstname, adults, kids)
+            return code, total
+
+        code, total = await self._run(reserve, retry=False)
+        if code is None:
+            raise ServiceError(409, f"Room {room} is already booked for some of those dates")
+        return {'code': code, 'room': room, 'checkin': checkin, 'checkout': checkout, 'total': total}
+
+    async def cancel(self, code):
+        if not await self._run(Lab7.delete_reservation, code, retry=False):
+            raise ServiceError(404, f"No reservation with code {code}")
+        return {'code': code, 'cancelled': True}
+
+    async def lookup(self, firstname='', lastname='', start='', end='', room='', code=''):
+        if not any([firstname, lastname, start, end, room, code]):
+            raise ServiceError(400, "give at least one of firstname, lastname, start, end, room, code")
+
+        def fetch(conn):
+            try:
+                shape, sql, params = queries.reservation_info_statement(
+                    firstname, lastname, start, end, room, code, reversed_names=migrations.reversed_names(conn))
+            except ValueError as err:
+                raise ServiceError(400, str(err))
+            return queries.fetch(conn, (shape, sql), params)
+
+        columns, rows = await self._run(fetch)
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def revenue(self, backend="sql", year=None):
+        if backend not in revenue_engine.BACKENDS:
+            raise ServiceError(400, f"backend must be one of {', '.join(revenue_engine.BACKENDS)}")
+        if year is not None and backend == "sql":
+            # The SQL date CTE only covers the current year
+            raise ServiceError(400, "the sql backend reports the current year only; use backend=numpy or summary")
+        if year is not None and not datetime.MINYEAR <= year < datetime.MAXYEAR:
+            raise ServiceError(400, f"year must be between {datetime.MINYEAR} and {datetime.MAXYEAR - 1}")
+        return records(await self._run(revenue_engine.revenue_frame, backend, year))
+
+    async def occupancy(self, start, end, rooms=()):
+        if end <= start:
+            raise ServiceError(400, "end must be after start")
+        if (end - start).days > MAX_OCCUPANCY_NIGHTS:
+            raise ServiceError(400, f"at most {MAX_OCCUPANCY_NIGHTS} nights per request")
+        codes, booked, room_rates, day_rates = await self._run(Lab7.occupancy_calendar_data, start, end, list(rooms))
+        return {'start': start, 'end': end, 'rooms': codes,
+                'booked': [''.join('1' if night else '0' for night in row) for row in booked],
+                'room_rates': [round(float(rate), 4) for rate in room_rates],
+                'day_rates': [round(float(rate), 4) for rate in day_rates]}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+async def dispatch(service, method, path, query, body):
+    # Maps one request to a service coroutine; returns (status, payload)
+    parts = [part for part in path.split('/') if part]
+
+    def arg(name, default=''):
+        return query.get(name, [default])[0].strip()
+
+    if method == 'GET' and parts == ['rooms']:
+        return 200, await service.rooms_and_rates()
+    if method == 'GET' and parts == ['availability']:
+        # Normalised like the menu and POST /reservations: room codes upper case, bed types capitalised
+        return 200, await service.availability(
+            parse_date(arg('checkin'), 'checkin'), parse_date(arg('checkout'), 'checkout'),
+            parse_int(arg('guests'), 'guests', 1),
+            (arg('room') or 'ANY').upper(), (arg('bed') or 'Any').capitalize())
+    if method == 'GET' and parts == ['reservations']:
+        return 200, await service.lookup(arg('firstname'), arg('lastname'), arg('start'), arg('end'),
+                                         arg('room'), arg('code'))
+    if method == 'POST' and parts == ['reservations']:
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            raise ServiceError(400, "body must be a JSON object")
+        if not isinstance(request, dict):
+            raise ServiceError(400, "body must be a JSON object")
+        for name in ('room', 'firstname', 'lastname'):
+            if not str(request.get(name) or '').strip():
+                raise ServiceError(400, f"{name} is required")
+        return 201, await service.book(
+            str(request['room']).strip().upper(),
+            parse_date(request.get('checkin'), 'checkin'), parse_date(request.get('checkout'), 'checkout'),
+            str(request['firstname']).strip().capitalize(), str(request['lastname']).strip().capitalize(),
+            parse_int(request.get('adults'), 'adults', 1), parse_int(request.get('kids'), 'kids', 0))
+    if method == 'DELETE' and len(parts) == 2 and parts[0] == 'reservations':
+        return 200, await service.cancel(parse_int(parts[1], 'code'))
+    if method == 'GET' and parts == ['revenue']:
+        year = parse_int(arg('year'), 'year') if arg('year') else None
+        return 200, await service.revenue(arg('backend') or ('numpy' if year is not None else 'sql'), year)
+    if method == 'GET' and parts == ['occupancy']:
+        rooms = [code.strip().upper() for code in arg('rooms').split(',') if code.strip()]
+        return 200, await service.occupancy(parse_date(arg('start'), 'start'), parse_date(arg('end'), 'end'), rooms)
+    raise ServiceError(404, f"No route for {method} {path}")
+
+
+async def read_request(reader):
+    # (method, path, query, body, keep_alive) for the next request, or None at end of stream
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise ServiceError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = parse_int(headers.get('content-length'), 'Content-Length', 0)
+    if length > MAX_BODY_BYTES:
+        raise ServiceError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b''
+
+    url = urllib.parse.urlsplit(target)
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+    return method.upper(), url.path, urllib.parse.parse_qs(url.query), body, keep_alive
+
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 409: 'Conflict',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload, default=to_json).encode()
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode('latin-1') + body)
+
+
+async def handle_client(service, reader, writer):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, query, body, keep_alive = request
+                status, payload = await dispatch(service, method, path, query, body)
+            except ServiceError as err:
+                status, payload = err.status, {'error': str(err)}
+            except mysql.connector.Error as err:
+                status, payload = 500, {'error': f"Database error: {err}"}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception:
+                # A bug, not a bad request: answer rather than drop the connection, and keep the trace
+                traceback.print_exc()
+                status, payload = 500, {'error': "Internal server error"}
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass  # Client went away mid-request
+    finally:
+        writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=8765):
+    server = await asyncio.start_server(lambda r, w: handle_client(service, r, w), host, port)
+    print(f"Serving reservations on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON over HTTP service for the LabThreeSixFive reservation system")
+    parser.add_argument("--host", default=os.environ.get("LAB7_DB_HOST", "mysql.labthreesixfive.com"),
+                        help="database server (default: $LAB7_DB_HOST or the labthreesixfive server)")
+    parser.add_argument("--database", default=os.environ.get("LAB7_DB_NAME", "jthammet"),
+                        help="database holding lab7_rooms and lab7_reservations (default: $LAB7_DB_NAME or jthammet)")
+    parser.add_argument("--user", default=os.environ.get("LAB7_DB_USER"),
+                        help="database user (default: $LAB7_DB_USER, prompted if unset)")
+    parser.add_argument("--listen", default="127.0.0.1", help="address to serve on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=8,
+                        help="operations run at once, each on its own pooled connection")
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="requests allowed to wait for a worker before new ones get 503")
+    args = parser.parse_args()
+
+    user = args.user or input("User: ")
+    password = os.environ.get("LAB7_DB_PASSWORD") or getpass.getpass()
+    pool = db.ConnectionPool(size=args.workers, user=user, password=password, host=args.host, database=args.database)
+
+    async def run():
+        service = ReservationService(pool, args.workers, args.max_pending)
+        try:
+            await serve(service, args.listen, args.port)
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("Service stopped.")
+
+
+if __name__ == "__main__":
+    main()
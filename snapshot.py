@@ -0,0 +1,227 @@
+import datetime
+import decimal
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import Lab7
+import export
+import pricing
+import queries
+import revenue_engine
+import revenue_parallel
+
+# Read side of export.py: loads a snapshot directory and answers the read-only reports
+# (rooms and rates, reservation info, revenue) from it, so they run without the database.
+# Arrow and Parquet parts are memory-mapped and kept as one pyarrow.Table (concatenating
+# tables copies no data); filters run on it with pyarrow.compute and only the rows a report
+# selects are converted to pandas. CSV parts can't be mapped and are read into a DataFrame.
+# Results follow the SQL versions, including case-insensitive name matching as in MySQL's
+# default collation.
+
+RESERVATION_COLUMNS = ['CODE', 'Room', 'CheckIn', 'Checkout', 'Rate', 'LastName', 'FirstName', 'Adults', 'Kids']
+
+
+def read_part(path, file_format):
+    if file_format == 'csv':
+        return pd.read_csv(path, compression='gzip')
+    if file_format == 'parquet':
+        return export.pq.read_table(path, memory_map=True)
+    return export.pa.ipc.open_file(export.pa.memory_map(path)).read_all()
+
+
+def like_regex(pattern):
+    # SQL LIKE pattern as an anchored, case-insensitive regular expression
+    body = ''.join('.*' if char == '%' else '.' if char == '_' else re.escape(char) for char in pattern)
+    return re.compile(body, re.IGNORECASE | re.DOTALL)
+
+
+def matches(column, kind, value):
+    # Boolean mask for one name or room filter of the given queries.match_kind
+    if kind == 'eq':
+        return column.str.upper() == value.upper()
+    regex = like_regex(value)
+    return column.map(lambda text: regex.fullmatch(text) is not None).astype(bool)
+
+
+def arrow_matches(column, kind, value):
+    # matches() for an Arrow column; match_like is SQL LIKE, with \ escaping as in MySQL
+    pc = export.pc
+    column = pc.cast(column, export.pa.string())
+    if kind == 'eq':
+        return pc.equal(pc.utf8_upper(column), value.upper())
+    return pc.match_like(column, value, ignore_case=True)
+
+
+class Snapshot:
+
+    def __init__(self, rooms, reservations, manifest):
+        self.rooms = rooms  # DataFrame; lab7_rooms is small
+        self.reservations = reservations  # pyarrow.Table (arrow, parquet) or DataFrame (csv)
+        self.manifest = manifest
+        self.arrow = not isinstance(reservations, pd.DataFrame)
+
+    @classmethod
+    def load(cls, directory):
+        manifest = export.read_manifest(directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot in {directory}; create one with --export")
+        file_format = manifest['format']
+        if file_format != 'csv' and export.pa is None:
+            raise ValueError(f"{directory} holds a {file_format} snapshot, which needs pyarrow to load")
+
+        rooms = read_part(os.path.join(directory, manifest['rooms']), file_format)
+        if not isinstance(rooms, pd.DataFrame):
+            rooms = rooms.to_pandas()
+        rooms['basePrice'] = rooms['basePrice'].astype(float)
+        parts = [read_part(os.path.join(directory, name), file_format) for name in manifest['reservations']]
+
+        if not parts:
+            return cls(rooms, normalize(pd.DataFrame(columns=RESERVATION_COLUMNS)), manifest)
+        if file_format != 'csv':
+            # Parts from older exports may each carry their own inferred schema; casting the
+            # columns that already match copies nothing
+            parts = [part.cast(export.reservation_schema(part.schema)) for part in parts]
+            return cls(rooms, export.pa.concat_tables(parts), manifest)
+        return cls(rooms, normalize(pd.concat(parts, ignore_index=True)), manifest)
+
+    def column_mask(self, column, kind, value):
+        # Boolean NumPy mask of reservations whose column matches a name or room filter
+        if self.arrow:
+            return arrow_matches(self.reservations[column], kind, value).to_numpy(zero_copy_only=False)
+        return matches(self.reservations[column].astype(str), kind, value).to_numpy()
+
+    def date_mask(self, column, compare, day):
+        # Boolean NumPy mask of reservations where `column <compare> day`, compare being one
+        # of the pyarrow.compute comparison names ('less', 'greater_equal', ...)
+        if self.arrow:
+            values = self.reservations[column]
+            day = export.pa.scalar(day, export.pa.date32()).cast(values.type)
+            return getattr(export.pc, compare)(values, day).to_numpy(zero_copy_only=False)
+        operators = {'less': '__lt__', 'less_equal': '__le__', 'greater': '__gt__', 'greater_equal': '__ge__'}
+        return getattr(self.reservations[column], operators[compare])(pd.Timestamp(day)).to_numpy()
+
+    def select(self, mask, columns=None):
+        # The reservations where mask is True (all of them for None) as a DataFrame, dates as
+        # datetime64 and money as float
+        res = self.reservations
+        if self.arrow:
+            if columns is not None:
+                res = res.select(columns)
+            if mask is not None:
+                res = res.filter(export.pa.array(mask, type=export.pa.bool_()))
+            return normalize(res.to_pandas())
+        if mask is not None:
+            res = res[mask]
+        return res[columns] if columns is not None else res
+
+    def reservation_rows(self, df):
+        # DataFrame rows as the database would return them, with dates as dates
+        df = df.copy()
+        for column in ('CheckIn', 'Checkout'):
+            df[column] = df[column].dt.date
+        df['Rate'] = [decimal.Decimal(f"{rate:.2f}") for rate in df['Rate']]
+        return [tuple(row) for row in df.itertuples(index=False)]
+
+    def rooms_and_rates_rows(self, today=None):
+        # Same columns and order as Lab7.ROOMS_AND_RATES_QUERY
+        today = today or datetime.date.today()
+        # Grouped on just the columns the report needs, so nothing else is read into memory
+        res = self.select(None, ['Room', 'CheckIn', 'Checkout'])
+        grouped = res.groupby('Room')
+        stats = pd.DataFrame({
+            'recent_stays': (res['CheckIn'] >= pd.Timestamp(today) - pd.Timedelta(days=180)).groupby(res['Room']).sum(),
+            'next_available_checkin': res['CheckIn'].where(res['CheckIn'] >= pd.Timestamp(today)).groupby(res['Room']).min(),
+            'last_stay_length': (grouped['Checkout'].max() - grouped['CheckIn'].min()).dt.days,
+            'last_checkout_date': grouped['Checkout'].max(),
+        })
+        df = self.rooms.merge(stats, how='left', left_on='RoomCode', right_index=True)
+        df['popularity_score'] = pricing.round_half_up(df['recent_stays'].fillna(0).to_numpy() / 180, 2)
+        df = df.sort_values('popularity_score', ascending=False, kind='stable')
+
+        columns = ['RoomCode', 'RoomName', 'Beds', 'bedType', 'maxOcc', 'basePrice', 'decor', 'popularity_score',
+                   'next_available_checkin', 'last_stay_length', 'last_checkout_date']
+        rows = []
+        for row in df[columns].itertuples(index=False):
+            values = []
+            for column, value in zip(columns, row):
+                if pd.isna(value):
+                    value = Lab7.ROOMS_AND_RATES_DEFAULTS.get(column)
+                elif isinstance(value, pd.Timestamp):
+                    value = value.date()
+                elif column == 'last_stay_length':
+                    value = int(value)
+                elif column == 'basePrice':
+                    value = decimal.Decimal(f"{value:.2f}")
+                values.append(value)
+            rows.append(tuple(values))
+        return columns, rows
+
+    def reservation_info(self, firstname='', lastname='', startdate='', enddate='', roomcode='', reservationcode=''):
+        # (columns, rows) for the reservation lookup; raises ValueError for the inputs the
+        # SQL version rejects and for dates or codes it couldn't compare
+        shape, _, _ = queries.reservation_info_statement(firstname, lastname, startdate, enddate,
+                                                         roomcode, reservationcode)
+        _, first, last, dates, room, code = shape
+        mask = np.ones(self.row_count(), dtype=bool)
+        for column, kind, value in (('FirstName', first, firstname), ('LastName', last, lastname),
+                                    ('Room', room, roomcode)):
+            if kind is not None:
+                mask &= self.column_mask(column, kind, value)
+
+        def covers(day):
+            day = datetime.date.fromisoformat(day)
+            return self.date_mask('CheckIn', 'less_equal', day) & self.date_mask('Checkout', 'greater_equal', day)
+
+        if dates == 'both':
+            mask &= covers(startdate) | covers(enddate)
+        elif dates == 'start':
+            mask &= covers(startdate)
+        elif dates == 'end':
+            mask &= covers(enddate)
+        if code is not None:
+            mask &= self.code_mask(int(reservationcode))
+        selected = self.select(mask)
+        return list(selected.columns), self.reservation_rows(selected)
+
+    def row_count(self):
+        return self.reservations.num_rows if self.arrow else len(self.reservations)
+
+    def code_mask(self, code):
+        if self.arrow:
+            return export.pc.equal(self.reservations['CODE'], code).to_numpy(zero_copy_only=False)
+        return (self.reservations['CODE'] == code).to_numpy()
+
+    def stays(self, start, end):
+        # (RoomName, CheckIn, Checkout, Rate) for stays overlapping [start, end)
+        mask = self.date_mask('CheckIn', 'less', end) & self.date_mask('Checkout', 'greater', start)
+        overlapping = self.select(mask, ['Room', 'CheckIn', 'Checkout', 'Rate'])
+        named = overlapping.merge(self.rooms[['RoomCode', 'RoomName']], left_on='Room', right_on='RoomCode')
+        return list(zip(named['RoomName'], named['CheckIn'].to_numpy(), named['Checkout'].to_numpy(),
+                        named['Rate']))
+
+    def revenue_frame(self, year=None):
+        # The current-year RoomName/Jan..Dec/Total report
+        year = year or datetime.date.today().year
+        return revenue_engine.revenue_from_rows(
+            self.stays(datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)), year)
+
+    def revenue_by_year(self, start, end):
+        # Same layout as revenue_parallel.revenue_by_year
+        frames = []
+        for year, year_start, year_end in revenue_parallel.years(start, end):
+            room_names, totals = revenue_engine.month_totals(self.stays(year_start, year_end), year_start, year_end)
+            frames.append(revenue_parallel.year_frame(year, room_names, totals))
+        return pd.concat(frames, ignore_index=True)
+
+
+def normalize(df):
+    # One representation whatever the format: dates as datetime64, money as float
+    for column in ('CheckIn', 'Checkout'):
+        if column in df:
+            df[column] = pd.to_datetime(df[column])
+    if 'Rate' in df:
+        df['Rate'] = df['Rate'].astype(float)
+    return df
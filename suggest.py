@@ -0,0 +1,59 @@
+import datetime
+
+import numpy as np
+
+from occupancy import build_occupancy_matrix, fetch_window_stays
+
+# Alternative suggestions for searches with no exact match. One fetch of the stays near the
+# requested dates gives a rooms x days occupancy matrix; a cumulative sum over its free nights
+# finds every window of the requested length for every room at once, and the windows are
+# ranked by how far they move the stay and how well the room matches the request.
+
+WINDOW_DAYS = 14  # How far either side of the requested check-in to look
+BED_MISMATCH_PENALTY = 3  # Ranks like moving the stay by this many days
+ROOM_MISMATCH_PENALTY = 2
+
+
+def free_window_starts(busy, nights):
+    # rooms x starts boolean matrix: True where the room is free for `nights` nights from that day
+    free = np.concatenate([np.zeros((busy.shape[0], 1), dtype=np.int32),
+                           np.cumsum(~busy, axis=1, dtype=np.int32)], axis=1)
+    return (free[:, nights:] - free[:, :-nights]) == nights
+
+
+def suggest_alternatives(cursor, rooms, room_preference, bed_type, start_date, end_date,
+                         top_k=5, window_days=WINDOW_DAYS, index=None, today=None):
+    # Returns up to top_k (room, check-in, checkout) options of the requested length, each room
+    # at its best-ranked window. rooms are candidate room rows (RoomCode first, bedType fourth).
+    if not rooms:
+        return []
+    today = today or datetime.date.today()
+    nights = (end_date - start_date).days
+    window_start = max(start_date - datetime.timedelta(days=window_days), today)
+    window_end = end_date + datetime.timedelta(days=window_days)
+    days = (window_end - window_start).days
+    if days < nights:
+        return []
+
+    codes = [room[0] for room in rooms]
+    stays = fetch_window_stays(cursor, window_start, window_end, codes, index)
+    fits = free_window_starts(build_occupancy_matrix(codes, stays, window_start, days), nights)
+
+    # Score every (room, start) pair: days moved plus penalties for a different room or bed
+    shift = np.abs(np.arange(fits.shape[1]) - (start_date - window_start).days)
+    penalty = np.zeros(len(rooms))
+    if bed_type != "Any":
+        penalty += BED_MISMATCH_PENALTY * np.array([room[3] != bed_type for room in rooms])
+    if room_preference != "ANY":
+        penalty += ROOM_MISMATCH_PENALTY * np.array([room[0] != room_preference for room in rooms])
+    scores = np.where(fits, shift[np.newaxis, :] + penalty[:, np.newaxis], np.inf)
+
+    best_start = scores.argmin(axis=1)
+    best_score = scores[np.arange(len(rooms)), best_start]
+    options = []
+    for i in np.argsort(best_score, kind='stable')[:top_k]:
+        if np.isinf(best_score[i]):
+            break
+        checkin = window_start + datetime.timedelta(days=int(best_start[i]))
+        options.append((rooms[i], checkin, checkin + datetime.timedelta(days=nights)))
+    return options
@@ -0,0 +1,15 @@
+import numbers
+
+# Plain-text tables for the menu's result sets. They are small, so tabulate is enough;
+# it is imported on first use to keep it out of startup as well.
+
+
+def format_table(columns, rows, header=True):
+    # Rows as aligned text. Values print as str() would, so DECIMAL money keeps its cents;
+    # numeric columns are right-aligned and NULLs left blank.
+    from tabulate import tabulate
+    numeric = [all(value is None or isinstance(value, numbers.Number) for value in column)
+               for column in zip(*rows)] or [False] * len(columns)
+    cells = [['' if value is None else str(value) for value in row] for row in rows]
+    return tabulate(cells, headers=columns if header else (), tablefmt='plain', disable_numparse=True,
+                    colalign=['right' if is_numeric else 'left' for is_numeric in numeric])
@@ -0,0 +1,27 @@
+import datetime
+import os
+import sys
+
+# The modules under test live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Shared by the availability and occupancy tests (from conftest import ...)
+START = datetime.date(2025, 1, 1)
+
+
+def sql_overlap(checkin, checkout, start_date, end_date):
+    # Reference for the overlap predicate of the availability query in find_available_rooms
+    return ((checkin <= start_date and checkout > start_date) or
+            (checkin < end_date and checkout >= end_date) or
+            (checkin >= start_date and checkout <= end_date))
+
+
+def random_stays(rng, rooms, count, days=90):
+    # `count` (room, checkin, checkout) stays in room codes `rooms`, checking in within `days`
+    # of START: mostly short stays with the odd long one, which bounds how far back overlaps reach
+    stays = []
+    for _ in range(count):
+        checkin = START + datetime.timedelta(days=rng.randint(0, days))
+        nights = rng.randint(1, 5) if rng.random() < 0.9 else rng.randint(10, 40)
+        stays.append((rng.choice(rooms), checkin, checkin + datetime.timedelta(days=nights)))
+    return stays
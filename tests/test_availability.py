@@ -0,0 +1,96 @@
+import datetime
+import random
+
+import Lab7
+from conftest import START, random_stays, sql_overlap
+
+
+class FakeCursor:
+    # Answers the room and availability queries from in-memory rows and counts each execute
+
+    def __init__(self, rooms, reservations):
+        self.rooms = rooms  # (RoomCode, RoomName, Beds, bedType, maxOcc, basePrice, decor)
+        self.reservations = reservations  # (Room, CheckIn, Checkout)
+        self.statements = []
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        params = list(params or [])
+        if 'FROM lab7_rooms' in sql:
+            guests = params.pop(0)
+            room = params.pop(0) if 'RoomCode = %s' in sql else None
+            bed = params.pop(0) if 'bedType = %s' in sql else None
+            self.rows = [r for r in self.rooms
+                         if r[4] >= guests and room in (None, r[0]) and bed in (None, r[3])]
+        elif 'SELECT DISTINCT res.Room' in sql:
+            codes, (start_date, _, end_date) = params[:-6], params[-6:-3]
+            self.rows = sorted({(room,) for room, checkin, checkout in self.reservations
+                                if room in codes and sql_overlap(checkin, checkout, start_date, end_date)})
+        elif 'SELECT 1' in sql:
+            room, start_date, _, end_date = params[:4]
+            self.rows = [(1,) for code, checkin, checkout in self.reservations
+                         if code == room and sql_overlap(checkin, checkout, start_date, end_date)]
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+        self.rowcount = len(self.rows)
+
+    def fetchall(self):
+        return self.rows
+
+
+def per_room_search(cursor, total_guests, start_date, end_date):
+    # The original make_reservation loop: one overlap query per candidate room
+    cursor.execute("SELECT ... FROM lab7_rooms r WHERE r.maxOcc >= %s", [total_guests])
+    available = []
+    for room in cursor.fetchall():
+        cursor.execute("SELECT 1 FROM lab7_reservations WHERE Room = %s AND (...)",
+                       (room[0], start_date, start_date, end_date, end_date, start_date, end_date))
+        cursor.fetchall()
+        if not cursor.rowcount:
+            available.append(room)
+    return available
+
+
+def hotel(seed, room_count=40, reservation_count=400):
+    rng = random.Random(seed)
+    rooms = [(f"R{i:04d}", f"Room {i}", rng.randint(1, 2), rng.choice(['King', 'Queen', 'Double']),
+              rng.randint(2, 4), 100.0 + i, 'modern') for i in range(room_count)]
+    return rooms, random_stays(rng, [room[0] for room in rooms], reservation_count, days=120)
+
+
+def setup_function():
+    Lab7.room_cache.clear()
+
+
+def test_search_runs_one_overlap_query_for_all_candidates():
+    rooms, reservations = hotel(1)
+    cursor = FakeCursor(rooms, reservations)
+    start_date, end_date = datetime.date(2025, 2, 1), datetime.date(2025, 2, 4)
+    Lab7.find_available_rooms(cursor, 1, 'ANY', 'Any', start_date, end_date)
+    # One candidate query and one overlap query, however many rooms are candidates
+    assert len(cursor.statements) == 2
+
+
+def test_search_matches_per_room_loop():
+    rng = random.Random(2)
+    for seed in range(20):
+        rooms, reservations = hotel(seed)
+        for _ in range(10):
+            Lab7.room_cache.clear()
+            start_date = START + datetime.timedelta(days=rng.randint(0, 130))
+            end_date = start_date + datetime.timedelta(days=rng.randint(1, 14))
+            guests = rng.randint(1, 4)
+            expected = per_room_search(FakeCursor(rooms, reservations), guests, start_date, end_date)
+            actual = Lab7.find_available_rooms(FakeCursor(rooms, reservations), guests, 'ANY', 'Any',
+                                               start_date, end_date)
+            assert actual == expected
+
+
+def test_search_with_preferences_filters_candidates():
+    rooms, reservations = hotel(3)
+    start_date, end_date = datetime.date(2025, 3, 1), datetime.date(2025, 3, 3)
+    expected = [room for room in per_room_search(FakeCursor(rooms, reservations), 1, start_date, end_date)
+                if room[3] == 'King']
+    actual = Lab7.find_available_rooms(FakeCursor(rooms, reservations), 1, 'ANY', 'King', start_date, end_date)
+    assert actual == expected
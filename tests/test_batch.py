@@ -0,0 +1,101 @@
+import datetime
+import decimal
+
+import batch
+
+STAY = ('R0001', datetime.date(2025, 3, 3), datetime.date(2025, 3, 6), decimal.Decimal('300.00'))
+
+
+class FakeCursor:
+    # Runs the batch writer's statements against FakeDatabase
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        reservations = self.db.reservations
+        self.rows, self.rowcount = [], 0
+        if sql.startswith('SHOW TABLES'):
+            self.rows = [('room_month_revenue',)]
+        elif 'FROM lab7_reservations WHERE CODE IN' in sql:
+            assert 'FOR UPDATE' in sql
+            self.rows = [(code,) + reservations[code] for code in sorted(set(params)) if code in reservations]
+        elif sql.startswith('DELETE'):
+            self.rowcount = 1 if reservations.pop(params[0], None) else 0
+            self.db.deletes += 1
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+
+    def executemany(self, sql, rows):
+        assert 'room_month_revenue' in sql
+        for room, year, month, revenue, nights in rows:
+            self.db.summary[room] = self.db.summary.get(room, 0) + revenue
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    in_transaction = False
+
+    def __init__(self):
+        # CODE -> (FirstName, LastName, Room, CheckIn, Checkout, Rate)
+        self.reservations = {10: ('Al', 'Smith') + STAY, 11: ('Bea', 'Jones') + STAY}
+        self.summary = {}  # Room -> revenue change applied by the batch
+        self.deletes = 0
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def cancel(code, first_name, last_name):
+    return {'op': 'cancel', 'code': code, 'first_name': first_name, 'last_name': last_name}
+
+
+def test_cancellations_subtract_each_deleted_stay_once():
+    db = FakeDatabase()
+    runner = batch.BatchRunner(db)
+    runner.run([cancel(10, 'al', 'smith'), cancel(10, 'al', 'smith'), cancel(11, 'al', 'smith'),
+                cancel(12, 'al', 'smith')])
+
+    assert sorted(db.reservations) == [11]
+    assert db.summary == {'R0001': decimal.Decimal('-300.00')}
+    assert [line for line, _ in sorted(runner.errors)] == [2, 3, 4]
+    assert 'already cancelled' in dict(runner.errors)[2]
+    assert runner.counts['cancel'] == 1
+
+
+def test_replayed_cancellations_check_ownership_again():
+    db = FakeDatabase()
+    runner = batch.BatchRunner(db)
+    runner.replay([(1, 10, 'Al', 'Smith'), (2, 10, 'Al', 'Smith'), (3, 11, 'Al', 'Smith')], [])
+
+    assert sorted(db.reservations) == [11]
+    assert db.deletes == 1
+    assert db.summary == {'R0001': decimal.Decimal('-300.00')}
+    assert [line for line, _ in sorted(runner.errors)] == [2, 3]
+    assert runner.counts['cancel'] == 1
+
+
+def test_failed_replay_is_not_counted():
+    db = FakeDatabase()
+    runner = batch.BatchRunner(db)
+
+    def fail(cancels):
+        raise batch.mysql.connector.Error("Lock wait timeout exceeded")
+    runner.cancel_owned = fail
+    runner.replay([(1, 10, 'Al', 'Smith')], [])
+
+    assert runner.counts['cancel'] == 0
+    assert [line for line, _ in runner.errors] == [1]
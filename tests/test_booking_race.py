@@ -0,0 +1,20 @@
+import argparse
+import os
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.environ.get('LAB7_BENCH_HOST'),
+                                reason="set LAB7_BENCH_HOST (and LAB7_BENCH_USER/PASSWORD/DATABASE) to a "
+                                       "stand-in MySQL database to run the booking race")
+
+
+def test_exactly_one_concurrent_booking_wins():
+    from benchmarks import booking_race, synthetic
+
+    parser = argparse.ArgumentParser()
+    synthetic.add_connection_args(parser)
+    codes, stored, errors = booking_race.race(parser.parse_args([]), clients=20)
+
+    assert errors == []
+    assert len(codes) == 1
+    assert stored == 1
@@ -0,0 +1,99 @@
+import datetime
+import random
+
+from conftest import START, random_stays, sql_overlap
+from occupancy import OccupancyIndex
+
+
+def brute_overlaps(stays, room, start_date, end_date):
+    return any(sql_overlap(checkin, checkout, start_date, end_date)
+               for code, (stay_room, checkin, checkout) in stays.items() if stay_room == room)
+
+
+def brute_first_free_window(stays, room, earliest, nights, latest):
+    day = earliest
+    while day <= latest:
+        if not brute_overlaps(stays, room, day, day + datetime.timedelta(days=nights)):
+            return day
+        day += datetime.timedelta(days=1)
+    return None
+
+
+def random_query(rng):
+    start_date = START + datetime.timedelta(days=rng.randint(-20, 120))
+    return start_date, start_date + datetime.timedelta(days=rng.randint(1, 15))
+
+
+def test_overlaps_matches_sql_predicate_through_adds_and_removes():
+    rng = random.Random(2)
+    rooms = ['R1', 'R2', 'R3']
+    index = OccupancyIndex()
+    stays = {}  # code -> (room, checkin, checkout), the reference copy
+    for code in range(1, 601):
+        if stays and rng.random() < 0.3:
+            removed = rng.choice(sorted(stays))
+            index.remove(removed)
+            del stays[removed]
+        else:
+            room, checkin, checkout = random_stays(rng, rooms, 1)[0]
+            index.add(code, room, checkin, checkout)
+            stays[code] = (room, checkin, checkout)
+
+        for _ in range(5):
+            room = rng.choice(rooms)
+            start_date, end_date = random_query(rng)
+            assert index.overlaps(room, start_date, end_date) == brute_overlaps(stays, room, start_date, end_date)
+
+
+def test_available_filters_room_rows():
+    rng = random.Random(3)
+    rooms = [f"R{i}" for i in range(10)]
+    index = OccupancyIndex()
+    stays = {}
+    for code in range(200):
+        stays[code] = random_stays(rng, rooms, 1)[0]
+        index.add(code, *stays[code])
+    rows = [(room, f"Room {room}") for room in rooms]
+    for _ in range(100):
+        start_date, end_date = random_query(rng)
+        expected = [row for row in rows if not brute_overlaps(stays, row[0], start_date, end_date)]
+        assert index.available(rows, start_date, end_date) == expected
+
+
+def test_remove_unknown_code_is_ignored():
+    index = OccupancyIndex()
+    index.add(1, 'R1', START, START + datetime.timedelta(days=2))
+    index.remove(99)
+    assert index.overlaps('R1', START, START + datetime.timedelta(days=1))
+
+
+def test_first_free_window_matches_day_by_day_search():
+    rng = random.Random(4)
+    rooms = ['R1', 'R2']
+    for trial in range(30):
+        index = OccupancyIndex()
+        stays = {}
+        for code in range(rng.randint(0, 40)):
+            stays[code] = random_stays(rng, rooms, 1)[0]
+            index.add(code, *stays[code])
+        # Remove a few so the index has gone through both operations
+        for code in rng.sample(sorted(stays), min(3, len(stays))):
+            index.remove(code)
+            del stays[code]
+
+        for _ in range(20):
+            room = rng.choice(rooms)
+            earliest = START + datetime.timedelta(days=rng.randint(-10, 100))
+            nights = rng.randint(1, 10)
+            latest = earliest + datetime.timedelta(days=rng.randint(0, 60))
+            expected = brute_first_free_window(stays, room, earliest, nights, latest)
+            assert index.first_free_window(room, earliest, nights, latest) == expected
+
+
+def test_first_free_window_without_latest_finds_gap_after_last_stay():
+    index = OccupancyIndex()
+    index.add(1, 'R1', START, START + datetime.timedelta(days=3))
+    index.add(2, 'R1', START + datetime.timedelta(days=4), START + datetime.timedelta(days=9))
+    # The one-night gap on day 3 is too short for two nights
+    assert index.first_free_window('R1', START, 2) == START + datetime.timedelta(days=9)
+    assert index.first_free_window('R1', START, 1) == START + datetime.timedelta(days=3)
@@ -0,0 +1,71 @@
+import datetime
+import decimal
+import random
+
+import numpy as np
+
+import pricing
+
+CENT = decimal.Decimal('0.01')
+FACTOR = decimal.Decimal('1.1')
+
+
+def nights(start, end):
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days)]
+
+
+def reference_cost(rate, start, end):
+    # The booking rule in exact DECIMAL arithmetic, rounded half up like MySQL
+    rate = decimal.Decimal(str(rate))
+    total = sum((rate * FACTOR if night.weekday() >= 5 else rate) for night in nights(start, end))
+    return float(decimal.Decimal(total).quantize(CENT, decimal.ROUND_HALF_UP))
+
+
+def random_stays(count, seed=365):
+    rng = random.Random(seed)
+    for _ in range(count):
+        start = datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randint(0, 730))
+        yield round(rng.uniform(50, 300), 2), start, start + datetime.timedelta(days=rng.randint(1, 30))
+
+
+def test_night_counts_match_day_by_day_count():
+    for _, start, end in random_stays(500):
+        weekdays, weekends = pricing.night_counts(start, end)
+        expected = sum(1 for night in nights(start, end) if night.weekday() < 5)
+        assert (weekdays, weekends) == (expected, (end - start).days - expected)
+
+
+def test_night_counts_vectorized_matches_single_stays():
+    stays = list(random_stays(200))
+    weekdays, weekends = pricing.night_counts([s for _, s, _ in stays], [e for _, _, e in stays])
+    for i, (_, start, end) in enumerate(stays):
+        assert (weekdays[i], weekends[i]) == pricing.night_counts(start, end)
+
+
+def test_stay_costs_match_decimal_rule():
+    for rate, start, end in random_stays(2000):
+        assert pricing.price_stay(rate, start, end) == reference_cost(rate, start, end)
+
+
+def test_stay_costs_round_half_cents_up():
+    # 12 weekday nights and 5 weekend nights: 3499.825
+    assert pricing.price_stay(199.99, datetime.date(2024, 12, 8), datetime.date(2024, 12, 25)) == 3499.83
+
+
+def test_stay_costs_per_room_rates_share_one_stay():
+    start, end = datetime.date(2025, 3, 6), datetime.date(2025, 3, 11)
+    rates = [75.0, 129.99, 250.5]
+    costs = pricing.stay_costs(rates, start, end)
+    assert costs.tolist() == [reference_cost(rate, start, end) for rate in rates]
+
+
+def test_nightly_revenue_matches_mysql_round():
+    # ROUND(CASE WHEN weekend THEN Rate * 1.1 ELSE Rate END / nights, 2) from the revenue query
+    rng = random.Random(7)
+    rates = [round(rng.uniform(50, 3000), 2) for _ in range(1000)]
+    stay_nights = [rng.randint(1, 30) for _ in rates]
+    weekend = [rng.random() < 0.3 for _ in rates]
+    daily = pricing.nightly_revenue(rates, np.array(stay_nights), np.array(weekend))
+    for i, rate in enumerate(rates):
+        amount = decimal.Decimal(str(rate)) * (FACTOR if weekend[i] else 1) / stay_nights[i]
+        assert daily[i] == float(amount.quantize(CENT, decimal.ROUND_HALF_UP))
@@ -0,0 +1,85 @@
+import datetime
+import decimal
+
+import pytest
+
+import export
+import snapshot
+
+ROOM_COLUMNS = ['RoomCode', 'RoomName', 'Beds', 'bedType', 'maxOcc', 'basePrice', 'decor']
+RESERVATION_COLUMNS = ['CODE', 'Room', 'CheckIn', 'Checkout', 'Rate', 'LastName', 'FirstName', 'Adults', 'Kids']
+ROOMS = [('R0001', 'Blue Room', 1, 'King', 2, decimal.Decimal('95.00'), 'modern'),
+         ('R0002', 'Suite', 2, 'Queen', 4, decimal.Decimal('1250.00'), 'rustic')]
+
+pyarrow_formats = pytest.mark.skipif(export.pa is None, reason="Arrow and Parquet snapshots need pyarrow")
+
+
+class FakeCursor:
+    # Answers the export's rooms query and keyset pages of reservations
+
+    def __init__(self, reservations):
+        self.reservations = reservations
+
+    def execute(self, sql, params=None):
+        if 'lab7_rooms' in sql:
+            self.rows, columns = ROOMS, ROOM_COLUMNS
+        else:
+            after = params[0] if 'CODE >' in sql else None
+            self.rows = [row for row in self.reservations if after is None or row[0] > after][:params[-1]]
+            columns = RESERVATION_COLUMNS
+        self.description = [(column,) for column in columns]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.reservations = []
+
+    def book(self, code, room, rate, checkin=datetime.date(2025, 3, 3), nights=2):
+        self.reservations.append((code, room, checkin, checkin + datetime.timedelta(days=nights),
+                                  decimal.Decimal(rate), 'SMITH', 'AL', 1, 0))
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.reservations)
+
+
+@pytest.mark.parametrize('file_format', [pytest.param('arrow', marks=pyarrow_formats),
+                                         pytest.param('parquet', marks=pyarrow_formats), 'csv'])
+def test_incremental_parts_with_different_rates_load_together(tmp_path, file_format):
+    conn = FakeConnection()
+    conn.book(1, 'R0001', '95.00')
+    export.export_snapshot(conn, str(tmp_path), file_format)
+    # A later, larger rate would infer a wider DECIMAL for its own part
+    conn.book(2, 'R0002', '1250.00')
+    conn.book(3, 'R0002', '12345.67', checkin=datetime.date(2025, 5, 1))
+    manifest = export.export_snapshot(conn, str(tmp_path), chunk_rows=1)
+    assert len(manifest['reservations']) == 3
+
+    snap = snapshot.Snapshot.load(str(tmp_path))
+    _, rows = snap.reservation_info(lastname='smith')
+    assert [(row[0], row[4]) for row in rows] == [
+        (1, decimal.Decimal('95.00')), (2, decimal.Decimal('1250.00')), (3, decimal.Decimal('12345.67'))]
+    revenue = snap.revenue_frame(2025).set_index('RoomName')['Total']
+    assert revenue.to_dict() == {'Suite': 13596, 'Blue Room': 95}
+
+
+@pyarrow_formats
+def test_parts_written_with_inferred_schemas_still_load(tmp_path):
+    # Snapshots exported before the reservations schema was fixed
+    conn = FakeConnection()
+    conn.book(1, 'R0001', '95.00')
+    export.export_snapshot(conn, str(tmp_path), 'arrow')
+    conn.book(2, 'R0002', '1250.00')
+    manifest = export.export_snapshot(conn, str(tmp_path))
+    for row, name in zip(conn.reservations, manifest['reservations']):
+        frame = export.pd.DataFrame([row], columns=RESERVATION_COLUMNS)
+        export.write_frame(frame, str(tmp_path / name), 'arrow')
+
+    snap = snapshot.Snapshot.load(str(tmp_path))
+    assert snap.row_count() == 2